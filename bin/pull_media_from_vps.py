@@ -11,15 +11,49 @@ from __future__ import annotations
 
 import argparse
 import datetime as _dt
+import functools
 import logging
+import posixpath
+import shlex
 import shutil
 import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable, Tuple
+from typing import IO, Callable, Iterable, List, Optional, Sequence, Tuple
 
 _LOGGER_NAME = "pull_media_from_vps"
 
+# rsync ``-i`` preamble/trailer lines that never describe a file change.
+_SKIP_PREFIXES = (b"sending ", b"receiving ", b"sent ", b"total size")
+# First two characters of an itemized line → which counter it bumps:
+# ``*deleting``, a received file (``>f``) or a locally created file (``cf``).
+_DELETED, _DOWNLOADED = "deleted", "downloaded"
+_LINE_KINDS = {b"*d": _DELETED, b">f": _DOWNLOADED, b"cf": _DOWNLOADED}
+_FAST_CIPHER_SSH_OPTIONS = (
+    "-o", "IPQoS=throughput",
+    "-o", "Compression=no",
+    "-c", "aes128-gcm@openssh.com",
+)
+# Shared-connection settings: later ssh/rsync invocations ride the first
+# one's authenticated connection instead of doing a fresh handshake.
+_SSH_MUX_OPTIONS = (
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=~/.ssh/cm-%r@%h:%p",
+    "-o", "ControlPersist=60s",
+)
+# Parallel transfer streams must each open their own TCP connection, or they
+# would all share (and be capped by) the master connection's single stream.
+_SSH_NO_MUX_OPTIONS = (
+    "-o", "ControlMaster=no",
+    "-o", "ControlPath=none",
+)
+# rsync output is written to the log file in batches of roughly this size.
+_LOG_BATCH_BYTES = 64 * 1024
+# Only every Nth rsync line is echoed to the console.
+_CONSOLE_SAMPLE_EVERY = 1000
+
 
 def _configure_logging(log_file: Path) -> logging.Logger:
     """Configure a logger that writes both to stdout and ``log_file``."""
@@ -47,26 +81,79 @@ def _configure_logging(log_file: Path) -> logging.Logger:
     return logger
 
 
+@functools.lru_cache(maxsize=1)
 def _rsync_available() -> bool:
     """Return ``True`` when ``rsync`` is available on ``PATH``."""
 
     return shutil.which("rsync") is not None
 
 
+@functools.lru_cache(maxsize=1)
+def _rsync_compress_choices() -> frozenset:
+    """Return the compression algorithms advertised by ``rsync --version``.
+
+    rsync 3.2+ prints a ``Compress list:`` section; older builds only know
+    zlib via a bare ``--compress`` and yield an empty set here.
+    """
+
+    try:
+        completed = subprocess.run(
+            ["rsync", "--version"],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    except OSError:
+        return frozenset()
+
+    lines = completed.stdout.splitlines()
+    for idx, line in enumerate(lines):
+        if line.strip().lower().startswith("compress list:"):
+            for candidate in lines[idx + 1:]:
+                if candidate.strip():
+                    return frozenset(candidate.split())
+            break
+    return frozenset()
+
+
+def _compress_args(args: argparse.Namespace) -> Tuple[str, ...]:
+    """Translate ``--compress``/``--compress-algo``/``--compress-level`` to rsync flags."""
+
+    if not args.compress or args.compress_algo == "none":
+        return ()
+    if args.compress_algo not in _rsync_compress_choices():
+        # Old rsync (or unsupported algorithm): plain zlib compression.
+        return ("--compress",)
+    flags = [f"--compress-choice={args.compress_algo}"]
+    if args.compress_algo != "lz4":  # lz4 has no tunable level
+        flags.append(f"--compress-level={args.compress_level}")
+    return tuple(flags)
+
+
 def _default_log_file(log_dir: Path) -> Path:
     timestamp = _dt.datetime.now().strftime("%Y%m%d-%H%M%S")
     return log_dir / f"pull_{timestamp}.log"
 
 
-def _build_ssh_command(args: argparse.Namespace) -> str:
+def _build_ssh_argv(args: argparse.Namespace, mux: bool = True) -> List[str]:
     parts = ["ssh"]
     if args.ssh_port:
         parts.extend(["-p", str(args.ssh_port)])
     if args.ssh_key:
         parts.extend(["-i", str(args.ssh_key)])
+    if args.ssh_mux:
+        parts.extend(_SSH_MUX_OPTIONS if mux else _SSH_NO_MUX_OPTIONS)
+    if args.fast_cipher:
+        # AES-GCM is hardware-accelerated nearly everywhere; rsync already
+        # compresses (or the media is incompressible), so ssh shouldn't.
+        parts.extend(_FAST_CIPHER_SSH_OPTIONS)
     if args.ssh_options:
         parts.extend(args.ssh_options)
-    return " ".join(parts)
+    return parts
+
+
+def _build_ssh_command(args: argparse.Namespace, mux: bool = True) -> str:
+    return " ".join(_build_ssh_argv(args, mux))
 
 
 def _default_media_log_dir(local_download_path: Path) -> Path:
@@ -82,22 +169,43 @@ def _default_media_log_dir(local_download_path: Path) -> Path:
     return parent / "media_log"
 
 
-def _build_rsync_command(
+def _rsync_base_argv(
     args: argparse.Namespace,
     ssh_command: str,
-    remote_path: str,
-    local_path: Path,
+    files_from: bool = False,
+    write_once: bool = True,
 ) -> Tuple[str, ...]:
-    remote = f"{args.remote_user}@{args.remote_host}:{remote_path}"
+    """Return every rsync argument except the source and destination.
+
+    Built once per run so every parallel worker shares the exact same
+    options.  Pass ``write_once=False`` for trees whose files are rewritten
+    in place (the media-log CSVs): ``--inplace`` is then left out, since its
+    append-style resume would skip files that did not grow.
+    """
+
     command = [
         "rsync",
-        "-avh",  # verbose, archive mode, human readable sizes
+        "-a",  # archive mode (recursive, preserve times/permissions/links)
         "-i",  # itemized changes to make parsing easier
         "--partial",  # resume partial transfers if interrupted
         "--prune-empty-dirs",
+        "--info=stats2,progress0",  # transfer stats without per-file chatter
     ]
-    if args.compress:
-        command.append("--compress")
+    if args.whole_file:
+        # Media is write-once and the destination is usually a clean mirror,
+        # so the delta algorithm only burns checksum CPU on both ends.
+        command.insert(2, "-W")
+    if files_from:
+        # NUL-separated relative paths arrive on stdin.  --files-from turns off
+        # the recursion implied by -a, so ask for it explicitly.
+        command.extend(["-r", "--from0", "--files-from=-"])
+    command.extend(_compress_args(args))
+    if args.inplace and write_once:
+        # Write straight into the destination file and resume by appending;
+        # skips the temp-file copy + rename for large write-once media.
+        command.extend(["--inplace", "--append-verify", "--preallocate"])
+    if args.bwlimit:
+        command.append(f"--bwlimit={args.bwlimit}")
     if args.delete:
         command.append("--delete")
     if args.dry_run:
@@ -106,25 +214,245 @@ def _build_rsync_command(
         command.extend(["-e", ssh_command])
     if args.extra_rsync_args:
         command.extend(args.extra_rsync_args)
-    command.extend([remote, str(local_path)])
     return tuple(command)
 
 
-def _summarize_changes(lines: Iterable[str]) -> Tuple[int, int]:
-    """Count downloaded and deleted files from rsync's ``-i`` output."""
+def _build_rsync_command(
+    args: argparse.Namespace,
+    base_argv: Tuple[str, ...],
+    remote_path: str,
+    local_path: Path,
+) -> Tuple[str, ...]:
+    remote = f"{args.remote_user}@{args.remote_host}:{remote_path}"
+    return (*base_argv, remote, str(local_path))
+
+
+class _ChangeCounter:
+    """Incrementally count downloaded and deleted files from rsync's ``-i`` output."""
+
+    def __init__(self) -> None:
+        self.downloaded = 0
+        self.deleted = 0
 
-    downloaded = 0
-    deleted = 0
-    for raw_line in lines:
+    def feed(self, raw_line: bytes) -> None:
         line = raw_line.strip()
-        if not line or line.startswith(("sending ", "receiving ", "sent ", "total size")):
-            continue
-        if line.startswith("*deleting"):
-            deleted += 1
-        elif line[0] in {">", "c"} and line[1:2] == "f":
-            # Files flagged with >f (transferred) or cf (created) count as downloads
-            downloaded += 1
-    return downloaded, deleted
+        if not line or line.startswith(_SKIP_PREFIXES):
+            return
+        kind = _LINE_KINDS.get(line[:2])
+        if kind is _DOWNLOADED:
+            self.downloaded += 1
+        elif kind is _DELETED:
+            self.deleted += 1
+
+
+class _LineBatcher:
+    """Forward raw rsync output lines to the log file in ~64 KiB batches.
+
+    Every line still lands in the log file, but as one record per batch
+    instead of one formatter call and ``write()`` per line, and each batch is
+    decoded once.  Console handlers only see every
+    ``_CONSOLE_SAMPLE_EVERY``-th line as a progress sign.
+    """
+
+    def __init__(self, logger: logging.Logger, tag: str, level: int = logging.INFO) -> None:
+        self._logger = logger
+        self._prefix = f"[{tag}] ".encode()
+        self._level = level
+        self._file_handlers = [h for h in logger.handlers if isinstance(h, logging.FileHandler)]
+        self._console_handlers = [h for h in logger.handlers if h not in self._file_handlers]
+        self._buf = bytearray()
+        self._count = 0
+
+    def _record(self, msg: str, *args: object) -> logging.LogRecord:
+        return self._logger.makeRecord(
+            self._logger.name, self._level, __file__, 0, msg, args, None
+        )
+
+    def add(self, line: bytes) -> None:
+        if self._count % _CONSOLE_SAMPLE_EVERY == 0:
+            record = self._record("%s", (self._prefix + line).decode("utf-8", "replace"))
+            for handler in self._console_handlers:
+                handler.handle(record)
+        self._count += 1
+        if self._buf:
+            self._buf += b"\n"
+        self._buf += self._prefix
+        self._buf += line
+        if len(self._buf) >= _LOG_BATCH_BYTES:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buf:
+            return
+        record = self._record("%s", self._buf.decode("utf-8", "replace"))
+        for handler in self._file_handlers:
+            handler.handle(record)
+        self._buf.clear()
+
+
+def _pump_lines(stream: IO[bytes], handle: Callable[[bytes], None]) -> None:
+    """Forward every line of ``stream`` to ``handle`` until EOF."""
+
+    try:
+        for raw_line in iter(stream.readline, b""):
+            handle(raw_line.rstrip(b"\n"))
+    finally:
+        stream.close()
+
+
+def _run_rsync(
+    command: Tuple[str, ...],
+    logger: logging.Logger,
+    tag: str,
+    files: Optional[Sequence[str]] = None,
+) -> Tuple[int, int, int]:
+    """Run ``command`` while streaming its output into ``logger``.
+
+    stdout and stderr are drained concurrently so rsync never blocks on a full
+    pipe and progress reaches the log file as it happens.  When ``files`` is
+    given it is written NUL-separated to rsync's stdin (for
+    ``--files-from=-``).  Returns ``(returncode, downloaded, deleted)``.
+    Raises ``OSError`` when rsync cannot be launched.
+    """
+
+    counter = _ChangeCounter()
+    batcher = _LineBatcher(logger, tag)
+
+    def _on_stdout(line: bytes) -> None:
+        batcher.add(line)
+        counter.feed(line)
+
+    def _on_stderr(line: bytes) -> None:
+        logger.warning("[%s] %s", tag, line.decode("utf-8", "replace"))
+
+    proc = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE if files is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    t_out = threading.Thread(target=_pump_lines, args=(proc.stdout, _on_stdout), daemon=True)
+    t_err = threading.Thread(target=_pump_lines, args=(proc.stderr, _on_stderr), daemon=True)
+    t_out.start()
+    t_err.start()
+    if files is not None:
+        try:
+            proc.stdin.write(
+                b"".join(name.encode("utf-8", "surrogateescape") + b"\0" for name in files)
+            )
+        except BrokenPipeError:
+            pass  # rsync exited early; its stderr explains why
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+    t_out.join()
+    t_err.join()
+    batcher.flush()
+    returncode = proc.wait()
+    return returncode, counter.downloaded, counter.deleted
+
+
+def _split_remote_root(remote_path: str) -> Tuple[str, str]:
+    """Split ``remote_path`` into an rsync source root and a relative prefix.
+
+    rsync copies ``/srv/igdl/downloads`` as a ``downloads`` folder but
+    ``/srv/igdl/downloads/`` as its contents.  Partitioned transfers keep the
+    same local layout by listing entries relative to the returned root.
+    """
+
+    if remote_path.endswith("/"):
+        return remote_path, ""
+    root, name = posixpath.split(remote_path)
+    return (root or ".") + "/", name
+
+
+def _list_remote_entries(args: argparse.Namespace, remote_path: str) -> List[str]:
+    """Return the top-level entries of ``remote_path`` on the VPS (one ssh call)."""
+
+    remote_dir = remote_path.rstrip("/") or "/"
+    command = [
+        *_build_ssh_argv(args),
+        f"{args.remote_user}@{args.remote_host}",
+        " ".join(
+            ["find", shlex.quote(remote_dir), "-mindepth", "1", "-maxdepth", "1", "-print0"]
+        ),
+    ]
+    completed = subprocess.run(command, capture_output=True, check=False)
+    if completed.returncode != 0:
+        raise OSError(
+            completed.stderr.decode("utf-8", "replace").strip()
+            or f"ssh exited with status {completed.returncode}"
+        )
+    return [
+        posixpath.basename(entry)
+        # surrogateescape round-trips non-UTF-8 names back to --files-from.
+        for entry in completed.stdout.decode("utf-8", "surrogateescape").split("\0")
+        if entry
+    ]
+
+
+def _run_rsync_parallel(
+    args: argparse.Namespace,
+    ssh_command: str,
+    base_argv: Tuple[str, ...],
+    remote_path: str,
+    local_path: Path,
+    logger: logging.Logger,
+    tag: str,
+) -> Tuple[int, int, int]:
+    """Split ``remote_path`` across ``args.parallel`` concurrent rsync processes.
+
+    Top-level entries are dealt round-robin into disjoint buckets so every
+    rsync gets its own TCP stream: the transfer streams opt out of SSH
+    connection sharing, while the listing and the ``--delete`` pass still
+    reuse the shared connection.  Falls back to a single rsync when the
+    listing fails or there is nothing to split.  Returns the first non-zero
+    exit status (or 0) together with the summed change counters.
+    """
+
+    try:
+        entries = _list_remote_entries(args, remote_path)
+    except OSError as exc:
+        logger.warning("Could not list %s for parallel transfer (%s); using one rsync.", remote_path, exc)
+        entries = []
+    if len(entries) < 2:
+        command = _build_rsync_command(args, base_argv, remote_path, local_path)
+        logger.debug("Executing command: %s", " ".join(command))
+        return _run_rsync(command, logger, tag)
+
+    root, prefix = _split_remote_root(remote_path)
+    workers = min(args.parallel, len(entries))
+    buckets: List[List[str]] = [[] for _ in range(workers)]
+    for idx, name in enumerate(sorted(entries)):
+        buckets[idx % workers].append(posixpath.join(prefix, name) if prefix else name)
+
+    files_argv = _rsync_base_argv(args, _build_ssh_command(args, mux=False), files_from=True)
+    command = _build_rsync_command(args, files_argv, root, local_path)
+    logger.info("Splitting %d entries across %d parallel rsync streams.", len(entries), workers)
+    logger.debug("Executing command (x%d): %s", workers, " ".join(command))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_run_rsync, command, logger, f"{tag}#{idx + 1}", bucket)
+            for idx, bucket in enumerate(buckets)
+        ]
+        results = [future.result() for future in futures]
+
+    if args.delete:
+        # The buckets only name entries that still exist remotely, so local
+        # top-level entries removed on the VPS need one single-stream pass
+        # that deletes without transferring anything.
+        extra = (*base_argv, "--existing", "--ignore-existing")
+        command = _build_rsync_command(args, extra, remote_path, local_path)
+        logger.debug("Executing command: %s", " ".join(command))
+        results.append(_run_rsync(command, logger, f"{tag}-delete"))
+
+    returncode = next((code for code, _, _ in results if code != 0), 0)
+    downloaded = sum(count for _, count, _ in results)
+    deleted = sum(count for _, _, count in results)
+    return returncode, downloaded, deleted
 
 
 def parse_args(argv: Iterable[str]) -> argparse.Namespace:
@@ -171,11 +499,67 @@ def parse_args(argv: Iterable[str]) -> argparse.Namespace:
             "used by rsync."
         ),
     )
+    parser.add_argument(
+        "--no-ssh-mux",
+        dest="ssh_mux",
+        action="store_false",
+        help=(
+            "Do not share one SSH connection (ControlMaster) between the "
+            "remote listing and the rsync transfers."
+        ),
+    )
+    parser.add_argument(
+        "--fast-cipher",
+        action="store_true",
+        help=(
+            "Use a CPU-cheap SSH transport (aes128-gcm, no ssh compression, "
+            "throughput QoS). Both ends must support aes128-gcm@openssh.com."
+        ),
+    )
+    parser.add_argument(
+        "--bwlimit",
+        help=(
+            "Cap rsync's transfer rate; passed through as --bwlimit "
+            "(e.g. 5m for 5 MiB/s)."
+        ),
+    )
     parser.add_argument(
         "--compress",
         action="store_true",
         help="Enable rsync compression (useful on slower links).",
     )
+    parser.add_argument(
+        "--compress-algo",
+        choices=("zstd", "lz4", "zlib", "none"),
+        default="zstd",
+        help=(
+            "Compression algorithm used with --compress (default: %(default)s). "
+            "Falls back to plain --compress when rsync does not support it."
+        ),
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        default=3,
+        help="Compression level used with --compress (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--no-whole-file",
+        dest="whole_file",
+        action="store_false",
+        help=(
+            "Use rsync's delta-transfer algorithm instead of copying whole files "
+            "(useful when resuming large partial transfers)."
+        ),
+    )
+    parser.add_argument(
+        "--inplace",
+        action="store_true",
+        help=(
+            "Update files in place and resume them by appending (adds --inplace, "
+            "--append-verify and --preallocate). Only safe for write-once media."
+        ),
+    )
     parser.add_argument(
         "--delete",
         action="store_true",
@@ -186,6 +570,16 @@ def parse_args(argv: Iterable[str]) -> argparse.Namespace:
         action="store_true",
         help="Perform a trial run with no changes to verify what would sync.",
     )
+    parser.add_argument(
+        "-j",
+        "--parallel",
+        type=int,
+        default=1,
+        help=(
+            "Number of concurrent rsync streams for the downloads directory. "
+            "Top-level entries are split across them (default: %(default)s)."
+        ),
+    )
     parser.add_argument(
         "--log-file",
         type=Path,
@@ -229,6 +623,9 @@ def parse_args(argv: Iterable[str]) -> argparse.Namespace:
 
 def main(argv: Iterable[str] | None = None) -> int:
     args = parse_args(argv if argv is not None else sys.argv[1:])
+    if args.parallel < 1:
+        print("Error: --parallel must be at least 1.", file=sys.stderr)
+        return 2
 
     if not _rsync_available():
         print("Error: rsync is required but not found on PATH.", file=sys.stderr)
@@ -261,9 +658,12 @@ def main(argv: Iterable[str] | None = None) -> int:
 
     if args.ssh_key:
         args.ssh_key = args.ssh_key.expanduser()
+    if args.ssh_mux:
+        # ssh refuses to create the control socket in a missing directory.
+        (Path.home() / ".ssh").mkdir(mode=0o700, exist_ok=True)
 
     ssh_command = _build_ssh_command(args)
-    rsync_command = _build_rsync_command(args, ssh_command, args.remote_path, local_path)
+    base_argv = _rsync_base_argv(args, ssh_command)
 
     logger.info("Starting synchronization.")
     logger.info("Remote: %s@%s:%s", args.remote_user, args.remote_host, args.remote_path)
@@ -271,34 +671,25 @@ def main(argv: Iterable[str] | None = None) -> int:
     if args.dry_run:
         logger.info("Dry-run mode enabled. No files will be modified.")
 
-    logger.debug("Executing command: %s", " ".join(rsync_command))
-
     try:
-        completed = subprocess.run(
-            rsync_command,
-            capture_output=True,
-            text=True,
-            check=False,
-        )
+        if args.parallel > 1:
+            returncode, downloaded, deleted = _run_rsync_parallel(
+                args, ssh_command, base_argv, args.remote_path, local_path, logger, "rsync"
+            )
+        else:
+            rsync_command = _build_rsync_command(args, base_argv, args.remote_path, local_path)
+            logger.debug("Executing command: %s", " ".join(rsync_command))
+            returncode, downloaded, deleted = _run_rsync(rsync_command, logger, "rsync")
     except OSError as exc:
         logger.error("Failed to launch rsync: %s", exc)
         return 1
 
-    stdout_lines = completed.stdout.splitlines() if completed.stdout else []
-    stderr_lines = completed.stderr.splitlines() if completed.stderr else []
-
-    for line in stdout_lines:
-        logger.info("[rsync] %s", line)
-    for line in stderr_lines:
-        logger.warning("[rsync] %s", line)
-
-    downloaded, deleted = _summarize_changes(stdout_lines)
     if downloaded or deleted:
         logger.info("Summary: %d file(s) downloaded, %d file(s) deleted.", downloaded, deleted)
 
-    if completed.returncode != 0:
-        logger.error("rsync exited with status %s", completed.returncode)
-        return completed.returncode
+    if returncode != 0:
+        logger.error("rsync exited with status %s", returncode)
+        return returncode
 
     if sync_media_log and media_log_local is not None:
         logger.info(
@@ -308,29 +699,18 @@ def main(argv: Iterable[str] | None = None) -> int:
         )
         log_command = _build_rsync_command(
             args,
-            ssh_command,
+            _rsync_base_argv(args, ssh_command, write_once=False),
             args.media_log_remote,
             media_log_local,
         )
         logger.debug("Executing command: %s", " ".join(log_command))
         try:
-            log_completed = subprocess.run(
-                log_command,
-                capture_output=True,
-                text=True,
-                check=False,
+            log_returncode, log_downloaded, log_deleted = _run_rsync(
+                log_command, logger, "rsync-media-log"
             )
         except OSError as exc:
             logger.warning("Failed to synchronize media logs: %s", exc)
         else:
-            log_stdout = log_completed.stdout.splitlines() if log_completed.stdout else []
-            log_stderr = log_completed.stderr.splitlines() if log_completed.stderr else []
-            for line in log_stdout:
-                logger.info("[rsync-media-log] %s", line)
-            for line in log_stderr:
-                logger.warning("[rsync-media-log] %s", line)
-
-            log_downloaded, log_deleted = _summarize_changes(log_stdout)
             if log_downloaded or log_deleted:
                 logger.info(
                     "Media log summary: %d file(s) downloaded, %d file(s) deleted.",
@@ -338,9 +718,9 @@ def main(argv: Iterable[str] | None = None) -> int:
                     log_deleted,
                 )
 
-            if log_completed.returncode != 0:
+            if log_returncode != 0:
                 logger.warning(
-                    "Media log synchronization exited with status %s", log_completed.returncode
+                    "Media log synchronization exited with status %s", log_returncode
                 )
 
     else:
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
-import os, sys, time, requests, pathlib
+import os, re, sys, io, gzip, shutil, time, requests, pathlib
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BOT_TOKEN = os.getenv("TG_BOT_TOKEN", "PUT_YOUR_BOT_TOKEN_HERE")
 CHAT_ID   = os.getenv("TG_CHAT_ID", "PUT_YOUR_CHAT_ID_HERE")
@@ -9,65 +11,151 @@ LAPTOP_LOG     = "/srv/igdl/laptop_push_pull_log.txt"
 LAPTOP_FRESH_WINDOW_HOURS = 24
 API_BASE = f"https://api.telegram.org/bot{BOT_TOKEN}"
 
+def _make_session():
+    # Reuse one keep-alive connection to api.telegram.org for every call.
+    s = requests.Session()
+    # Every Bot API call here is a POST, which urllib3 won't retry by default.
+    # A retry after a lost response can deliver the same message twice; for a
+    # daily report that beats dropping it.
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=frozenset({"GET", "POST"}))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry)
+    s.mount("https://", adapter)
+    return s
+
+SESSION = _make_session()
+
 def send_text(text, parse_mode=None):
     data = {"chat_id": CHAT_ID, "text": text}
     if parse_mode:
         data["parse_mode"] = parse_mode
         data["disable_web_page_preview"] = True
-    r = requests.post(f"{API_BASE}/sendMessage", data=data, timeout=30)
+    r = SESSION.post(f"{API_BASE}/sendMessage", data=data, timeout=30)
     r.raise_for_status()
 
+# Text logs compress ~10x; Telegram delivers the .gz as a regular document.
+GZIP_SUFFIXES = (".log", ".txt")
+
+def _gzip_file(path):
+    buf = io.BytesIO()
+    with open(path, "rb") as src, gzip.GzipFile(
+        filename=os.path.basename(path), mode="wb", fileobj=buf
+    ) as gz:
+        shutil.copyfileobj(src, gz, 1 << 20)
+    buf.seek(0)
+    return buf
+
 def send_document(path, caption=None):
-    with open(path, "rb") as f:
-        files = {"document": (os.path.basename(path), f)}
+    name = os.path.basename(path)
+    if name.lower().endswith(GZIP_SUFFIXES):
+        f, name, mime = _gzip_file(path), name + ".gz", "application/gzip"
+    else:
+        f, mime = open(path, "rb"), None
+    with f:
+        files = {"document": (name, f, mime)}
         data = {"chat_id": CHAT_ID}
         if caption:
             data["caption"] = caption
-        r = requests.post(f"{API_BASE}/sendDocument", data=data, files=files, timeout=60)
+        r = SESSION.post(f"{API_BASE}/sendDocument", data=data, files=files, timeout=60)
         r.raise_for_status()
 
+TEXT_LIMIT = 3800  # stay under Telegram's 4096-char message cap
+_MD_SPECIAL_RX = re.compile(r"([_*`\[])")
+
+def md_escape(text):
+    # Plain status lines ride in the same Markdown message; escape its specials.
+    return _MD_SPECIAL_RX.sub(r"\\\1", text)
+
+def chunk_blocks(blocks, limit=TEXT_LIMIT, sep="\n\n"):
+    """Join blocks with sep into as few messages of at most limit chars as possible."""
+    out, cur = [], ""
+    for block in blocks:
+        if cur and len(cur) + len(sep) + len(block) > limit:
+            out.append(cur)
+            cur = block
+        else:
+            cur = f"{cur}{sep}{block}" if cur else block
+    if cur:
+        out.append(cur)
+    return out
+
 def read_text(path):
     with open(path, "r", encoding="utf-8", errors="replace") as f:
         return f.read().strip()
 
-def is_fresh(path, hours):
+def tail_lines(path, n=15, block=4096):
+    """Last n lines of path (like read_text(path).splitlines()[-n:]) without reading it all."""
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        buf = bytearray()
+        # Read backwards until n full lines sit after the trailing whitespace.
+        while pos > 0 and buf.rstrip().count(b"\n") < n:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            buf[:0] = f.read(step)
+    text = buf.decode("utf-8", "replace").rstrip()
+    if pos == 0:
+        text = text.lstrip()
+    return text.splitlines()[-n:]
+
+def stat_or_none(path):
     try:
-        mtime = pathlib.Path(path).stat().st_mtime
+        return pathlib.Path(path).stat()
     except FileNotFoundError:
+        return None
+
+def is_fresh(path, hours, st=None):
+    st = st if st is not None else stat_or_none(path)
+    if st is None:
         return False
-    return (time.time() - mtime) <= hours * 3600
+    return (time.time() - st.st_mtime) <= hours * 3600
 
 def main():
     if "PUT_YOUR_BOT_TOKEN_HERE" in BOT_TOKEN or "PUT_YOUR_CHAT_ID_HERE" in CHAT_ID:
         print("Set TG_BOT_TOKEN and TG_CHAT_ID (env) or edit the script.", file=sys.stderr)
         sys.exit(2)
 
+    # Collect everything first, then send one Markdown message (split only if
+    # it would exceed Telegram's limit) followed by the attachments.
+    blocks = ["📣 IGDL Daily Report"]
+    docs = []
+
     # Server summary first
     if os.path.exists(SERVER_SUMMARY):
         txt = read_text(SERVER_SUMMARY)
-        msg = f"📣 IGDL Daily Report\n\n🖥️ *Server summary*\n```\n{txt}\n```"
-        if len(msg) <= 3800:
-            send_text(msg, parse_mode="Markdown")
+        block = f"🖥️ *Server summary*\n```\n{txt}\n```"
+        if len(block) <= TEXT_LIMIT:
+            blocks.append(block)
         else:
-            send_text("📣 IGDL Daily Report\n🖥️ Server summary is long — attaching as file.")
-            send_document(SERVER_SUMMARY, caption="server_last_run.log")
+            blocks.append(md_escape("🖥️ Server summary is long — attaching as file."))
+            docs.append((SERVER_SUMMARY, "server_last_run.log"))
     else:
-        send_text("📣 IGDL Daily Report\n🖥️ No server_last_run.log found.")
+        blocks.append(md_escape("🖥️ No server_last_run.log found."))
 
     # Laptop log if fresh within 24h
-    if is_fresh(LAPTOP_LOG, LAPTOP_FRESH_WINDOW_HOURS):
+    laptop_st = stat_or_none(LAPTOP_LOG)
+    if is_fresh(LAPTOP_LOG, LAPTOP_FRESH_WINDOW_HOURS, laptop_st):
         try:
-            tail = "\n".join(read_text(LAPTOP_LOG).splitlines()[-15:])
+            tail = "\n".join(tail_lines(LAPTOP_LOG, 15))
             teaser = f"💻 *Laptop log* (last 24h)\n```\n{tail}\n```"
-            if len(teaser) <= 3800:
-                send_text(teaser, parse_mode="Markdown")
+            if len(teaser) <= TEXT_LIMIT:
+                blocks.append(teaser)
             else:
-                send_text("💻 Laptop log is large — attaching full file.")
-            send_document(LAPTOP_LOG, caption="laptop_push_pull_log.txt (fresh)")
+                blocks.append(md_escape("💻 Laptop log is large — attaching full file."))
+            docs.append((LAPTOP_LOG, "laptop_push_pull_log.txt (fresh)"))
         except Exception as e:
-            send_text(f"⚠️ Could not attach laptop log: {e}")
+            blocks.append(md_escape(f"⚠️ Could not attach laptop log: {e}"))
     else:
-        send_text("ℹ️ No fresh laptop log in the last 24 hours.")
+        blocks.append(md_escape("ℹ️ No fresh laptop log in the last 24 hours."))
+
+    for text in chunk_blocks(blocks):
+        send_text(text, parse_mode="Markdown")
+    for path, caption in docs:
+        try:
+            send_document(path, caption=caption)
+        except Exception as e:
+            send_text(f"⚠️ Could not attach {os.path.basename(path)}: {e}")
 
 if __name__ == "__main__":
     main()
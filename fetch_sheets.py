@@ -1,49 +1,45 @@
-import os, csv, io, requests
+import os, re, csv, io, itertools, requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 ROOT = "/srv/igdl"
 ENV = {}
 
-# read .env
+# read .env — one match per line: skips blanks/comments, splits on the first "="
+_ENV_LINE_RX = re.compile(r"^\s*([^#=\s][^=]*)=(.*)$")
 env_path = os.path.join(ROOT, ".env")
 if os.path.exists(env_path):
     with open(env_path, "r", encoding="utf-8") as f:
         for line in f:
-            line = line.strip()
-            if not line or line.startswith("#") or "=" not in line:
-                continue
-            k, v = line.split("=", 1)
-            ENV[k.strip()] = v.strip()
+            m = _ENV_LINE_RX.match(line)
+            if m:
+                ENV[m.group(1).strip()] = m.group(2).strip()
 
 PROFILES_URL = ENV.get("GSHEET_PROFILES_CSV", "")
 SESSIONS_URL = ENV.get("GSHEET_SESSIONS_CSV", "")
 
+def _make_session() -> requests.Session:
+    # One pooled keep-alive session so both sheet fetches share the TLS connection.
+    s = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+SESSION = _make_session()
+
 def _fetch_csv_text(url: str) -> str:
-    r = requests.get(url, timeout=30)
+    r = SESSION.get(url, timeout=30)
     r.raise_for_status()
     return r.text
 
-def _parse_profiles(text: str) -> list[str]:
-    out = []
-    f = io.StringIO(text)
-    rows = list(csv.reader(f))
-    if not rows:
-        return out
+def _cell(row: list[str], idx: int) -> str:
+    return (row[idx] if len(row) > idx else "").strip()
 
-    # If header-like first row contains a known field, use DictReader
-    hdr = [c.strip().lower() for c in rows[0]]
-    if any(x in hdr for x in ("profile", "profiles", "username")):
-        f.seek(0)
-        reader = csv.DictReader(f)
-        fields = {k.lower(): k for k in (reader.fieldnames or [])}
-        pick = fields.get("profile") or fields.get("profiles") or fields.get("username")
-        if pick:
-            for row in reader:
-                val = (row.get(pick) or "").strip()
-                if val and not val.startswith("#"):
-                    out.append(val)
-            return out
-
-    # fallback: first column
+def _first_column(rows) -> list[str]:
+    out = []
     for row in rows:
         if not row:
             continue
@@ -52,6 +48,34 @@ def _parse_profiles(text: str) -> list[str]:
             out.append(val)
     return out
 
+def _read_header(text: str):
+    # Single streaming pass: peek the first row, let the caller pick a layout,
+    # then keep consuming the same reader.
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, None)
+    if header is None:
+        return None, None, reader
+    return header, [c.strip().lower() for c in header], reader
+
+def _parse_profiles(text: str) -> list[str]:
+    header, hdr, reader = _read_header(text)
+    if header is None:
+        return []
+
+    # If header-like first row contains a known field, read that column
+    for key in ("profile", "profiles", "username"):
+        if key in hdr:
+            idx = hdr.index(key)
+            out = []
+            for row in reader:
+                val = _cell(row, idx)
+                if val and not val.startswith("#"):
+                    out.append(val)
+            return out
+
+    # fallback: first column (the first row was data, not a header)
+    return _first_column(itertools.chain([header], reader))
+
 def _parse_sessions(text: str) -> list[str]:
     """
     Supported layouts:
@@ -59,22 +83,16 @@ def _parse_sessions(text: str) -> list[str]:
       B) header row with cookie/cookies      -> emit cookie string as-is
       C) single column (raw sessionid/cookie per line)
     """
+    header, hdr, reader = _read_header(text)
+    if header is None:
+        return []
     out = []
-    f = io.StringIO(text)
-    rows = list(csv.reader(f))
-    if not rows:
-        return out
-
-    hdr = [c.strip().lower() for c in rows[0]]
 
     # B) cookie/cookies column present
     if ("cookie" in hdr) or ("cookies" in hdr):
-        f.seek(0)
-        reader = csv.DictReader(f)
-        fields = {k.lower(): k for k in (reader.fieldnames or [])}
-        ck = fields.get("cookie") or fields.get("cookies")
+        ck_idx = hdr.index("cookie") if "cookie" in hdr else hdr.index("cookies")
         for row in reader:
-            s = (row.get(ck) or "").strip()
+            s = _cell(row, ck_idx)
             if s and not s.startswith("#"):
                 out.append(s)
         return out
@@ -83,11 +101,11 @@ def _parse_sessions(text: str) -> list[str]:
     if ("username" in hdr) and ("sessionid" in hdr):
         user_idx = hdr.index("username")
         sid_idx  = hdr.index("sessionid")
-        for row in rows[1:]:
+        for row in reader:
             if not row:
                 continue
-            u = (row[user_idx] if len(row) > user_idx else "").strip()
-            s = (row[sid_idx]  if len(row) > sid_idx  else "").strip()
+            u = _cell(row, user_idx)
+            s = _cell(row, sid_idx)
             if s and u and not u.startswith("#"):
                 out.append(f"{u}|{s}")
             elif s and not s.startswith("#"):
@@ -95,42 +113,43 @@ def _parse_sessions(text: str) -> list[str]:
         return out
 
     # C) single column fallback (first column)
-    for row in rows:
-        if not row:
-            continue
-        val = (row[0] or "").strip()
-        if val and not val.startswith("#"):
-            out.append(val)
-    return out
+    return _first_column(itertools.chain([header], reader))
 
 def write_lines(path: str, lines: list[str]):
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        for x in lines:
-            f.write(x.strip() + "\n")
+    # Write-then-rename: the downloader never reads a half-written list.
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.writelines(x.strip() + "\n" for x in lines)
+    os.replace(tmp, path)
 
 def main():
-    # PROFILES
-    if PROFILES_URL:
-        try:
-            profs = _parse_profiles(_fetch_csv_text(PROFILES_URL))
-            write_lines(os.path.join(ROOT, "profiles.txt"), profs)
-            print(f"Wrote profiles.txt with {len(profs)} line(s).")
-        except Exception as e:
-            print(f"⚠️ Profiles fetch failed: {e}")
-    else:
-        print("GSHEET_PROFILES_CSV not set; skipped profiles.txt.")
-
-    # SESSIONS
-    if SESSIONS_URL:
-        try:
-            sess = _parse_sessions(_fetch_csv_text(SESSIONS_URL))
-            write_lines(os.path.join(ROOT, "sessions.txt"), sess)
-            print(f"Wrote sessions.txt with {len(sess)} line(s).")
-        except Exception as e:
-            print(f"⚠️ Sessions fetch failed: {e}")
-    else:
-        print("GSHEET_SESSIONS_CSV not set; skipped sessions.txt.")
+    # Start both downloads up front so the two round trips overlap.
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        prof_job = ex.submit(_fetch_csv_text, PROFILES_URL) if PROFILES_URL else None
+        sess_job = ex.submit(_fetch_csv_text, SESSIONS_URL) if SESSIONS_URL else None
+
+        # PROFILES
+        if prof_job is not None:
+            try:
+                profs = _parse_profiles(prof_job.result())
+                write_lines(os.path.join(ROOT, "profiles.txt"), profs)
+                print(f"Wrote profiles.txt with {len(profs)} line(s).")
+            except Exception as e:
+                print(f"⚠️ Profiles fetch failed: {e}")
+        else:
+            print("GSHEET_PROFILES_CSV not set; skipped profiles.txt.")
+
+        # SESSIONS
+        if sess_job is not None:
+            try:
+                sess = _parse_sessions(sess_job.result())
+                write_lines(os.path.join(ROOT, "sessions.txt"), sess)
+                print(f"Wrote sessions.txt with {len(sess)} line(s).")
+            except Exception as e:
+                print(f"⚠️ Sessions fetch failed: {e}")
+        else:
+            print("GSHEET_SESSIONS_CSV not set; skipped sessions.txt.")
 
 if __name__ == "__main__":
     main()
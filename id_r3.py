@@ -9,6 +9,7 @@
 #    - sessions.txt cookie handling (supports sessionid or cookie string)
 #    - Time-based session rotation across the whole run
 #    - Error-based rotation on 403/429/login issues
+#    - --parallel-profiles N: N profiles at once, each on its own session slice
 #
 # ✅ Robustness & speed
 #    - Duplicate-safe fallback video rescue (checks base + media dirs)
@@ -16,49 +17,84 @@
 #    - Consecutive-seen streak to bail fast when nothing new
 #    - Date windows with strict edges (pdt > --after, pdt < --before)
 #    - Bounded probes avoid endless 403 spam
+#    - Story & highlight items fetched concurrently (IG_DL_WORKERS, default 5)
 #
 # USAGE
 #   python insta_download_unified.py daily some_profile --feed-only
 #   python insta_download_unified.py daily -f profiles.txt --reels-only --rotate-interval 90
 #   python insta_download_unified.py init some_profile --after 2024-08-01
 #   python insta_download_unified.py all some_profile  # includes stories & highlights
+#   python insta_download_unified.py daily -f profiles.txt --parallel-profiles 3
 #
 # Marker files (per profile, per stream):
 #   downloads/<profile>/metadata/latest_seen_feed.json
 #   downloads/<profile>/metadata/latest_seen_reels.json
-#   Format: {"ts":"YYYY-MM-DDTHH:MM:SS+00:00","shortcode":"abc123"}
+#   Format: {"ts":"YYYY-MM-DDTHH:MM:SS+00:00","shortcode":"abc123","epoch_us":1700000000000000}
+#   (epoch_us is what comparisons use; "ts" stays for humans and older builds)
 
 print("▶ INSTADL unified build r3 (probes+marker-seed+safe-unpack)")
 
 import os
 import sys
 import time
+import atexit
 import shutil
 import re
 import json
-from datetime import datetime, timezone
-from typing import Iterable, Tuple, List, Dict, Optional
+import random
+import functools
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterable, Tuple, List, Dict, Optional
 import argparse
+from collections import deque
 
 import instaloader
 from instaloader import exceptions
+from requests.adapters import HTTPAdapter
 
 # ——— Run relative to this script ———
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 os.chdir(SCRIPT_DIR)
 
 from log_guard import already_logged_post  # must exist in the same folder
+try:
+    from log_guard import load_index as _guard_load_index
+except ImportError:  # older log_guard: fall back to per-post already_logged_post calls
+    _guard_load_index = None
 
 # —————————————————————————————
 # CONFIG
 # —————————————————————————————
+# Pacing budget (seconds) charged per post; spent from a per-session token
+# bucket, so time already lost to slow requests counts toward it.
 PER_POST_SLEEP = 1.0
 ITER_THROTTLE_SEC = 0.75  # tiny delay per post to reduce GraphQL pressure
+THROTTLE_BURST_SEC = 3.0  # unused budget that may be banked for bursts
+# AIMD on the pacing rate: halve it on every hard error, creep back by
+# PACE_STEP after PACE_RECOVER_AFTER clean downloads (never above 1.0).
+PACE_MIN_RATE = 0.125
+PACE_STEP = 0.05
+PACE_RECOVER_AFTER = 20
 
 MEDIA_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".mp4", ".mov"}
 META_EXTS = {".txt", ".json", ".xz", ".xml", ".log"}
 
 DOWNLOAD_METADATA = True  # toggled via CLI
+# Daily runs only need shortcode + timestamp per post (markers, backfill), so
+# instaloader's full JSON is replaced by a two-key file; set in main().
+MINIMAL_METADATA = False
+
+FALLBACK_WORKERS = 4  # concurrent fallback video fetches per post
+HTTP_POOL_MAXSIZE = 32  # keep-alive connections per host (GraphQL + CDN + fallbacks)
+PROFILE_CACHE_TTL_SEC = 300  # reuse Profile.from_username results across retries
+SORT_INTERVAL_SEC = 10.0  # run move_sorted at most this often while downloading
+STORYITEM_WORKERS = int(os.environ.get("IG_DL_WORKERS", "5"))  # concurrent story/highlight item downloads
 
 BACKOFF_BASE_SEC = 120
 BACKOFF_CAP_SEC = 480
@@ -81,13 +117,74 @@ RUN_LOG = os.path.join(LOG_DIR, f"insta_download_unified_{RUN_TS}.txt")
 # Logging
 # —————————————————————————————
 
+class _LogWriter:
+    """Append-only run log: one handle for the whole run, lines written in batches.
+
+    write() only queues the line; a daemon thread started on first use writes
+    the batch every FLUSH_SEC seconds (sooner once FLUSH_LINES are queued),
+    and flush() drains it at interpreter exit. flush_sync() also fsyncs, for
+    callers that need durability; nothing on the hot path calls it.
+    """
+    FLUSH_LINES = 64
+    FLUSH_SEC = 0.5
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = None
+        self._buf = deque()
+        self._lock = threading.Lock()      # guards _buf; never held across disk I/O
+        self._io_lock = threading.Lock()   # serializes file writes, keeps batches in order
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self, line: str):
+        with self._lock:
+            self._buf.append(line)
+            pending = len(self._buf)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="run-log", daemon=True)
+                self._thread.start()
+        if pending >= self.FLUSH_LINES:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.FLUSH_SEC)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._io_lock:
+            with self._lock:
+                if not self._buf:
+                    return
+                data = "".join(self._buf)
+                self._buf.clear()
+            try:
+                if self._fh is None:
+                    self._fh = open(self.path, "a", encoding="utf-8")
+                self._fh.write(data)
+                self._fh.flush()
+            except Exception:
+                pass
+
+    def flush_sync(self):
+        self.flush()
+        with self._io_lock:
+            if self._fh is not None:
+                try:
+                    os.fsync(self._fh.fileno())
+                except Exception:
+                    pass
+
+
+_RUN_LOG_WRITER = _LogWriter(RUN_LOG)
+atexit.register(_RUN_LOG_WRITER.flush)
+
+
 def _log_line(msg: str):
     ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    try:
-        with open(RUN_LOG, "a", encoding="utf-8") as fh:
-            fh.write(f"{ts} | {msg}\n")
-    except Exception:
-        pass
+    _RUN_LOG_WRITER.write(f"{ts} | {msg}\n")
 
 # —————————————————————————————
 # Housekeeping
@@ -97,35 +194,71 @@ def is_temp(fname: str) -> bool:
     return fname.endswith(".tmp") or fname.endswith(".part") or fname.endswith("~")
 
 
+# Directory mtimes seen after the last cleanup; the "﹨" folders can only
+# appear as new entries in these directories, which bumps their mtime.
+CLEANUP_MARKER = os.path.join(SCRIPT_DIR, ".cleanup_marker")
+_CLEANUP_DIRS = (".", "downloads")
+
+
+def _cleanup_stamp() -> str:
+    parts = []
+    for d in _CLEANUP_DIRS:
+        try:
+            parts.append(str(os.stat(d).st_mtime_ns))
+        except FileNotFoundError:
+            parts.append("-")
+    return " ".join(parts)
+
+
 def initial_cleanup():
+    try:
+        with open(CLEANUP_MARKER, "r", encoding="utf-8") as fh:
+            if fh.read().strip() == _cleanup_stamp():
+                return  # nothing added since the last scan
+    except OSError:
+        pass
+    _fix_backslash_folders()
+    try:
+        if not os.path.exists(CLEANUP_MARKER):
+            open(CLEANUP_MARKER, "a").close()  # creating it bumps "." — stamp afterwards
+        stamp = _cleanup_stamp()
+        # Rewrite in place (no rename) so the marker itself doesn't touch "."'s mtime.
+        with open(CLEANUP_MARKER, "w", encoding="utf-8") as fh:
+            fh.write(stamp + "\n")
+    except OSError:
+        pass
+
+
+def _fix_backslash_folders():
     # Fix accidental "downloads﹨profile" folders dragged from Windows UI
-    for item in os.listdir("."):
-        if os.path.isdir(item) and "﹨" in item:
-            parts = item.split("﹨", 1)
-            if parts[0] == "downloads":
-                profile = parts[1]
-                os.makedirs("downloads", exist_ok=True)
-                src = item
-                dst = os.path.join("downloads", profile)
-                if not os.path.exists(dst):
-                    try:
-                        shutil.move(src, dst)
-                    except Exception:
-                        pass
+    with os.scandir(".") as it:
+        odd_root = [e.name for e in it if "﹨" in e.name and e.is_dir()]
+    for item in odd_root:
+        parts = item.split("﹨", 1)
+        if parts[0] == "downloads":
+            profile = parts[1]
+            os.makedirs("downloads", exist_ok=True)
+            src = item
+            dst = os.path.join("downloads", profile)
+            if not os.path.exists(dst):
+                try:
+                    shutil.move(src, dst)
+                except Exception:
+                    pass
 
     # Fix nested weird names inside downloads/
     if os.path.exists("downloads"):
-        for folder in os.listdir("downloads"):
-            if "﹨" in folder:
-                parts = folder.split("﹨", 1)
-                profile = parts[1]
-                wrong = os.path.join("downloads", folder)
-                correct = os.path.join("downloads", profile)
-                if not os.path.exists(correct):
-                    try:
-                        shutil.move(wrong, correct)
-                    except Exception:
-                        pass
+        with os.scandir("downloads") as it:
+            odd_nested = [(e.name, e.path) for e in it if "﹨" in e.name]
+        for folder, wrong in odd_nested:
+            parts = folder.split("﹨", 1)
+            profile = parts[1]
+            correct = os.path.join("downloads", profile)
+            if not os.path.exists(correct):
+                try:
+                    shutil.move(wrong, correct)
+                except Exception:
+                    pass
 
 
 def ensure_dirs_for_profile(base_path: str):
@@ -141,10 +274,9 @@ def move_sorted(base_path: str):
     meta_path = os.path.join(base_path, "metadata")
     os.makedirs(media_path, exist_ok=True)
     os.makedirs(meta_path, exist_ok=True)
-    for fname in os.listdir(base_path):
-        full = os.path.join(base_path, fname)
-        if os.path.isdir(full) or is_temp(fname):
-            continue
+    with os.scandir(base_path) as it:
+        files = [(e.name, e.path) for e in it if not e.is_dir() and not is_temp(e.name)]
+    for fname, full in files:
         ext = os.path.splitext(fname)[1].lower()
         try:
             if ext in MEDIA_EXTS:
@@ -158,35 +290,113 @@ def move_sorted(base_path: str):
 # Filenames / identity
 # —————————————————————————————
 
-def expected_basename_from_post(post) -> str:
+_UTC = timezone.utc
+_BASENAME_FMT = "%Y-%m-%d_%H-%M-%S_UTC"
+
+
+def _post_dt_utc(post) -> Optional[datetime]:
     dt = getattr(post, "date_utc", None)
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=_UTC)
+    return dt.astimezone(_UTC)
+
+
+def expected_basename_from_post(post) -> str:
+    dt = _post_dt_utc(post)
     if dt is None:
         return ""
-    if dt.tzinfo is not None:
-        dt = dt.astimezone(timezone.utc)
-    else:
-        dt = dt.replace(tzinfo=timezone.utc)
-    return dt.strftime("%Y-%m-%d_%H-%M-%S_UTC")
+    return dt.strftime(_BASENAME_FMT)
 
 
-def get_post_identifiers(post):
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+
+
+def _epoch_us(dt: datetime) -> int:
+    return (dt - _EPOCH) // _ONE_US
+
+
+def _epoch_us_to_iso(epoch_us: int) -> str:
+    if not epoch_us:
+        return ""
+    return (_EPOCH + timedelta(microseconds=epoch_us)).isoformat()
+
+
+# get_post_identifiers runs several times back to back for the same post
+# (iterator, guards, fallbacks); keep the last answer with a strong ref to
+# the post so identity can't be recycled.
+_last_identifiers: Tuple[object, Tuple[str, str, str], Tuple[int, str]] = (None, ("", "", ""), (0, ""))
+
+
+def _identify(post) -> Tuple[Tuple[str, str, str], Tuple[int, str]]:
+    global _last_identifiers
+    cached_post, cached, cached_ident = _last_identifiers
+    if cached_post is post:
+        return cached, cached_ident
     shortcode = getattr(post, "shortcode", None) or "unknown"
-    basename = expected_basename_from_post(post) or shortcode
-    ts_iso = getattr(post, "date_utc", None)
-    if ts_iso is not None:
-        if ts_iso.tzinfo is None:
-            ts_iso = ts_iso.replace(tzinfo=timezone.utc)
-        else:
-            ts_iso = ts_iso.astimezone(timezone.utc)
-        ts_iso = ts_iso.isoformat()
+    dt = _post_dt_utc(post)
+    if dt is not None:
+        basename = dt.strftime(_BASENAME_FMT)
+        ts_iso = dt.isoformat()
+        ident = (_epoch_us(dt), shortcode)
     else:
+        basename = shortcode
         ts_iso = ""
-    return basename, shortcode, ts_iso
+        ident = (0, shortcode)
+    result = (basename, shortcode, ts_iso)
+    _last_identifiers = (post, result, ident)
+    return result, ident
+
+
+def get_post_identifiers(post):
+    return _identify(post)[0]
+
+
+def post_ident(post) -> Tuple[int, str]:
+    """(epoch microseconds, shortcode) — the ordering key for marker comparisons."""
+    return _identify(post)[1]
 
 # —————————————————————————————
 # Disk existence checks (multi-dir)
 # —————————————————————————————
 
+class _DirListingCache:
+    """Directory snapshots reused until the directory's mtime changes.
+
+    Each entry is (mtime_ns, file names, lowercased name set); directories
+    are left out, as no media check wants them. Creating, renaming
+    or deleting a file bumps the directory mtime, so a stale snapshot is
+    replaced on the next lookup; callers that just wrote files can also
+    drop entries explicitly via invalidate().
+    """
+    def __init__(self):
+        self._entries: Dict[str, Tuple[int, Tuple[str, ...], frozenset]] = {}
+
+    def listing(self, path: str) -> Tuple[Tuple[str, ...], frozenset]:
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+            hit = self._entries.get(path)
+            if hit is not None and hit[0] == mtime_ns:
+                return hit[1], hit[2]
+            with os.scandir(path) as it:
+                names = tuple(e.name for e in it if not e.is_dir())
+        except FileNotFoundError:
+            self._entries.pop(path, None)
+            return (), frozenset()
+        lower = frozenset(fn.lower() for fn in names)
+        self._entries[path] = (mtime_ns, names, lower)
+        return names, lower
+
+    def invalidate(self, *paths: str):
+        for path in paths:
+            self._entries.pop(path, None)
+
+
+_DIR_CACHE = _DirListingCache()
+
+
 def _multi_dir_iter(dir_paths):
     if isinstance(dir_paths, str):
         dir_paths = [dir_paths]
@@ -194,39 +404,127 @@ def _multi_dir_iter(dir_paths):
         yield d
 
 
+_MP4_SUFFIXES = (".mp4",)
+_MEDIA_SUFFIXES = tuple(sorted(MEDIA_EXTS))
+
+
+def _has_stem_file(lower_names: frozenset, stems, suffixes) -> bool:
+    """True if some name is '<stem><ext>' or '<stem>_<anything><ext>' (case-insensitive)."""
+    stems = [st.lower() for st in stems if st]
+    for st in stems:
+        for ext in suffixes:
+            if st + ext in lower_names:
+                return True
+    for fn in lower_names:
+        if not fn.endswith(suffixes):
+            continue
+        for st in stems:
+            if fn.startswith(st):
+                root = fn[len(st):].rpartition(".")[0]
+                if len(root) > 1 and root[0] == "_":
+                    return True
+    return False
+
+
 def any_mp4_exists_for_post(dir_paths, shortcode, basename) -> bool:
-    from re import compile, escape, IGNORECASE
-    sc_pat = compile(rf"^{escape(shortcode)}(?:_.+)?\.mp4$", IGNORECASE)
-    bs_pat = compile(rf"^{escape(basename)}(?:_.+)?\.mp4$", IGNORECASE)
     for d in _multi_dir_iter(dir_paths):
-        try:
-            for fn in os.listdir(d):
-                if sc_pat.match(fn) or bs_pat.match(fn):
-                    return True
-        except FileNotFoundError:
-            pass
+        _, lower = _DIR_CACHE.listing(d)
+        if _has_stem_file(lower, (shortcode, basename), _MP4_SUFFIXES):
+            return True
     return False
 
 
 def any_media_exists_for_post(dir_paths, shortcode, basename) -> bool:
-    from re import compile, escape, IGNORECASE
-    exts = r"(?:jpg|jpeg|png|webp|mp4|mov)"
-    pat1 = compile(rf"^{escape(basename)}(?:_.+)?\.{exts}$", IGNORECASE)
-    pat2 = compile(rf"^{escape(shortcode)}(?:_.+)?\.{exts}$", IGNORECASE)
     for d in _multi_dir_iter(dir_paths):
-        try:
-            for fn in os.listdir(d):
-                if pat1.match(fn) or pat2.match(fn):
-                    return True
-        except FileNotFoundError:
-            pass
+        _, lower = _DIR_CACHE.listing(d)
+        if _has_stem_file(lower, (basename, shortcode), _MEDIA_SUFFIXES):
+            return True
     return False
 
 # —————————————————————————————
 # Log guard wrapper + backfill
 # —————————————————————————————
 
+
+class LogIndex:
+    """One profile's log_guard index, loaded once at profile start.
+
+    Lookups go to log_guard's own index (same answers as already_logged_post);
+    posts downloaded during the run are added with add() instead of re-reading
+    the log.
+    """
+    def __init__(self, guard):
+        self._guard = guard
+        self._local = set()
+
+    def add(self, basename: str, shortcode: str):
+        if basename:
+            self._local.add(basename)
+        if shortcode and shortcode != "unknown":
+            self._local.add(shortcode)
+
+    def seen(self, basename: str, shortcode: str) -> bool:
+        basename = (basename or "").strip()
+        shortcode = (shortcode or "").strip()
+        if basename in self._local or shortcode in self._local:
+            return True
+        return self._guard.seen(basename, shortcode)
+
+
+_LOG_INDEXES: Dict[str, LogIndex] = {}
+
+
+def build_log_index(log_dir: str) -> Optional[LogIndex]:
+    if _guard_load_index is None:
+        return None
+    try:
+        index = LogIndex(_guard_load_index(log_dir))
+    except Exception as e:
+        print(f"   (log_guard warning) {e}")
+        return None
+    _LOG_INDEXES[log_dir] = index
+    return index
+
+
+# Shortcodes already handled for a profile, persisted as metadata/seen.txt so
+# the next run starts with them instead of rediscovering each one. Story and
+# highlight items are stored as "story/<sc>" and "hl/<title>/<sc>".
+SEEN_FILENAME = "seen.txt"
+_SEEN_SETS: Dict[str, set] = {}
+
+
+def seen_set(meta_dir: str) -> set:
+    seen = _SEEN_SETS.get(meta_dir)
+    if seen is None:
+        try:
+            with open(os.path.join(meta_dir, SEEN_FILENAME), "r", encoding="utf-8") as fh:
+                seen = set(fh.read().splitlines())
+        except OSError:
+            seen = set()
+        seen.discard("")
+        _SEEN_SETS[meta_dir] = seen
+    return seen
+
+
+def save_seen(meta_dir: str):
+    seen = _SEEN_SETS.get(meta_dir)
+    if not seen:
+        return
+    path = os.path.join(meta_dir, SEEN_FILENAME)
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(sorted(seen)) + "\n")
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"   (seen.txt warning) {e}")
+
+
 def already_logged_wrapper(post, log_dir) -> bool:
+    index = _LOG_INDEXES.get(log_dir)
+    if index is not None:
+        basename, shortcode, _ = get_post_identifiers(post)
+        return index.seen(basename, shortcode)
     try:
         basename, shortcode, _ = get_post_identifiers(post)
         return already_logged_post(log_dir, basename, shortcode)
@@ -242,29 +540,24 @@ def already_logged_wrapper(post, log_dir) -> bool:
         return False
 
 
+_UTC_MEDIA_RX = re.compile(r"(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}_UTC)(?:_.+)?\.(?:jpg|jpeg|png|webp|mp4|mov)$", re.I)
+
+
 def backfill_log_from_disk(media_dir: str):
-    if not os.path.isdir(media_dir):
+    """Register posts already on disk with the profile's LogIndex.
+
+    One pass over the (cached, scandir-built) media listing; sidecar files
+    collapse to one basename. log_guard's CSV is read-only, so the old
+    per-file already_logged_post() + metadata JSON reads had no effect
+    beyond their cost; call after build_log_index().
+    """
+    index = _LOG_INDEXES.get(media_dir)
+    if index is None or not os.path.isdir(media_dir):
         return
-    pat = re.compile(r"(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}_UTC)(?:_.+)?\.(?:jpg|jpeg|png|webp|mp4|mov)$", re.I)
-    for fn in os.listdir(media_dir):
-        m = pat.match(fn)
-        if not m:
-            continue
-        basename = m.group(1)
-        shortcode = None
-        meta_json = os.path.join(os.path.dirname(media_dir), "metadata", f"{basename}.json")
-        if os.path.exists(meta_json):
-            try:
-                with open(meta_json, "r", encoding="utf-8") as fh:
-                    j = json.load(fh)
-                    shortcode = j.get("shortcode") or j.get("node", {}).get("shortcode")
-            except Exception:
-                pass
-        shortcode = shortcode or "unknown"
-        try:
-            already_logged_post(media_dir, basename, shortcode)
-        except Exception:
-            pass
+    names, _ = _DIR_CACHE.listing(media_dir)
+    basenames = {m.group(1) for m in map(_UTC_MEDIA_RX.match, names) if m}
+    for basename in basenames:
+        index.add(basename, "")
 
 # —————————————————————————————
 # Marker helpers (daily boundary stop)
@@ -274,97 +567,190 @@ def _marker_path(meta_dir: str, stream: str) -> str:
     return os.path.join(meta_dir, f"latest_seen_{stream}.json")
 
 
-def load_marker(meta_dir: str, stream: str) -> Optional[Tuple[str, str]]:
+def load_marker(meta_dir: str, stream: str) -> Optional[Tuple[int, str]]:
     path = _marker_path(meta_dir, stream)
-    if not os.path.exists(path):
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
         return None
+    return _load_marker_cached(path, mtime_ns)
+
+
+@functools.lru_cache(maxsize=256)
+def _load_marker_cached(path: str, mtime_ns: int) -> Optional[Tuple[int, str]]:
+    # mtime_ns is part of the key, so a rewritten marker is re-parsed.
     try:
         with open(path, "r", encoding="utf-8") as fh:
             j = json.load(fh)
+        sc = j.get("shortcode") or ""
+        if isinstance(j.get("epoch_us"), int):
+            return (j["epoch_us"], sc)
         ts = j.get("ts")
-        sc = j.get("shortcode")
         if not ts:
             return None
-        return (ts, sc or "")
+        return ident_tuple(ts, sc)  # marker written before epoch_us existed
     except Exception:
         return None
 
 
-def save_marker(meta_dir: str, stream: str, ts_iso: str, shortcode: str):
+def save_marker(meta_dir: str, stream: str, epoch_us: int, shortcode: str):
     path = _marker_path(meta_dir, stream)
+    tmp = path + ".tmp"
+    marker = {"ts": _epoch_us_to_iso(epoch_us), "shortcode": shortcode or "", "epoch_us": epoch_us}
     try:
-        with open(path, "w", encoding="utf-8") as fh:
-            json.dump({"ts": ts_iso, "shortcode": shortcode or ""}, fh, ensure_ascii=False)
+        # Write-then-rename so a concurrent reader never sees a torn marker.
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(marker, fh, separators=(",", ":"))
+        os.replace(tmp, path)
     except Exception:
         pass
+    _load_marker_cached.cache_clear()  # don't trust mtime granularity right after a write
+
+
+def ident_tuple(ts_iso: str, shortcode: str) -> Tuple[int, str]:
+    """ISO timestamp + shortcode → (epoch_us, shortcode); 0 when ts is missing/unparseable."""
+    epoch_us = 0
+    if ts_iso:
+        try:
+            dt = datetime.fromisoformat(str(ts_iso).replace("Z", "+00:00"))
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            epoch_us = _epoch_us(dt)
+        except ValueError:
+            pass
+    return (epoch_us, shortcode or "")
+
+def debug_save_marker(meta_dir: str, stream: str, epoch_us: int, shortcode: str, reason: str):
+    save_marker(meta_dir, stream, epoch_us, shortcode)
+    print(f"   🏷️ wrote marker latest_seen_{stream}.json → ts={_epoch_us_to_iso(epoch_us)} sc={shortcode} ({reason})")
+
+_META_TS_RX = re.compile(r"(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})_UTC")
+
 
+def _shortcode_from_json(j) -> str:
+    return j.get("shortcode") or j.get("node", {}).get("shortcode") or ""
 
-def ident_tuple(ts_iso: str, shortcode: str) -> Tuple[str, str]:
-    return (ts_iso or "", shortcode or "")
 
-def debug_save_marker(meta_dir: str, stream: str, ts_iso: str, shortcode: str, reason: str):
-    save_marker(meta_dir, stream, ts_iso, shortcode)
-    print(f"   🏷️ wrote marker latest_seen_{stream}.json → ts={ts_iso} sc={shortcode} ({reason})")
+def _ident_from_meta_json(path: str) -> Optional[Tuple[int, str]]:
+    """Slow path for metadata files whose name carries no timestamp."""
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            j = json.load(fh)
+        ts = j.get("date_utc") or j.get("taken_at") or j.get("date")
+        if not ts:
+            return None
+        try:
+            dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+        except Exception:
+            dt = datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return (_epoch_us(dt), _shortcode_from_json(j))
+    except Exception:
+        return None
+
 
-def _find_newest_from_disk(media_dir: str) -> Optional[Tuple[str, str]]:
-    """Look into metadata JSON files to find newest ts/shortcode already downloaded."""
+def _find_newest_from_disk(media_dir: str) -> Optional[Tuple[int, str]]:
+    """Find newest ts/shortcode already downloaded, using metadata filenames.
+
+    Instaloader names metadata '<YYYY-MM-DD_HH-MM-SS>_UTC.json', so the
+    newest post is found from names alone; only that one file is parsed to
+    recover its shortcode.
+    """
     meta_dir = os.path.join(os.path.dirname(media_dir), "metadata")
     if not os.path.isdir(meta_dir):
         return None
     newest = None
-    for fn in os.listdir(meta_dir):
-        if not fn.lower().endswith(".json"):
-            continue
-        path = os.path.join(meta_dir, fn)
-        try:
-            with open(path, "r", encoding="utf-8") as fh:
-                j = json.load(fh)
-            ts = j.get("date_utc") or j.get("taken_at") or j.get("date")
-            sc = j.get("shortcode") or j.get("node", {}).get("shortcode") or ""
-            if not ts:
-                m = re.match(r"(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})_UTC", os.path.splitext(fn)[0])
+    newest_path = None
+    try:
+        with os.scandir(meta_dir) as it:
+            for entry in it:
+                if not entry.name.lower().endswith(".json") or not entry.is_file():
+                    continue
+                m = _META_TS_RX.match(os.path.splitext(entry.name)[0])
                 if m:
-                    dt = datetime.strptime(m.group(1), "%Y-%m-%d_%H-%M-%S").replace(tzinfo=timezone.utc)
-                    ts = dt.isoformat()
-            if not ts:
-                continue
-            try:
-                dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
-            except Exception:
-                try:
-                    dt = datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
-                except Exception:
+                    try:
+                        dt = datetime.strptime(m.group(1), "%Y-%m-%d_%H-%M-%S").replace(tzinfo=timezone.utc)
+                    except ValueError:
+                        continue
+                    ident = (_epoch_us(dt), "")
+                    if newest is None or ident[0] > newest[0]:
+                        newest, newest_path = ident, entry.path
                     continue
-            iso = dt.astimezone(timezone.utc).isoformat()
-            ident = (iso, sc or "")
-            if newest is None or ident > newest:
-                newest = ident
+                ident = _ident_from_meta_json(entry.path)
+                if ident and (newest is None or ident > newest):
+                    newest, newest_path = ident, None
+    except FileNotFoundError:
+        return None
+    if newest is not None and newest_path is not None:
+        try:
+            with open(newest_path, "r", encoding="utf-8") as fh:
+                newest = (newest[0], _shortcode_from_json(json.load(fh)))
         except Exception:
-            continue
+            pass
     return newest
 
 # —————————————————————————————
 # Fallback video rescue
 # —————————————————————————————
 
+STREAM_CHUNK = 1024 * 1024  # 1 MiB copy buffer for fallback downloads
+
+
+def _prepare_dest(f, size: int):
+    """Hint sequential access and reserve `size` bytes up front (Linux; best effort)."""
+    fd = f.fileno()
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+    if size > 0 and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except OSError:
+            pass
+
+
 def stream_save(session, url, dest_path):
+    opened = False
     try:
         with session.get(url, stream=True, timeout=60) as r:
             r.raise_for_status()
+            r.raw.decode_content = True
             with open(dest_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=1024 * 256):
-                    if chunk:
-                        f.write(chunk)
+                opened = True
+                size = int(r.headers.get("Content-Length") or 0)
+                if not r.headers.get("Content-Encoding"):
+                    _prepare_dest(f, size)
+                shutil.copyfileobj(r.raw, f, STREAM_CHUNK)
+                f.truncate()  # drop any preallocated tail if the body came up short
         return True
     except Exception as e:
         print(f"   ↪  Fallback download failed: {e}")
+        if opened:
+            # A partial (or preallocated) file would later pass the mp4 existence checks.
+            try:
+                os.remove(dest_path)
+            except OSError:
+                pass
         return False
 
 
+def stream_save_many(session, jobs) -> int:
+    """Fetch several (url, dest_path) pairs concurrently; return how many were saved."""
+    if not jobs:
+        return 0
+    if len(jobs) == 1:
+        return int(stream_save(session, *jobs[0]))
+    with ThreadPoolExecutor(max_workers=min(FALLBACK_WORKERS, len(jobs))) as pool:
+        return sum(pool.map(lambda job: stream_save(session, *job), jobs))
+
+
 def ensure_post_videos(L, post, media_dir, base_dir):
-    rescued = 0
     session = L.context._session
     basename, shortcode, _ = get_post_identifiers(post)
+    jobs = []
 
     def mp4_exists():
         return any_mp4_exists_for_post([base_dir, media_dir], shortcode, basename)
@@ -374,8 +760,7 @@ def ensure_post_videos(L, post, media_dir, base_dir):
         if not mp4_exists() and getattr(post, "video_url", None):
             dest = os.path.join(media_dir, f"{basename}.mp4")
             print(f"   ↪  No mp4 for {shortcode}. Fallback → {os.path.basename(dest)}")
-            if stream_save(session, post.video_url, dest):
-                rescued += 1
+            jobs.append((post.video_url, dest))
 
     # Sidecar videos (check specific files only)
     try:
@@ -388,12 +773,12 @@ def ensure_post_videos(L, post, media_dir, base_dir):
                     side_in_base  = os.path.join(base_dir,  side_name)
                     if not (os.path.exists(side_in_media) or os.path.exists(side_in_base)):
                         print(f"   ↪  Sidecar missing. Fallback for {shortcode} [{i+1}] → {side_name}")
-                        if stream_save(session, node.video_url, side_in_media):
-                            rescued += 1
+                        jobs.append((node.video_url, side_in_media))
     except Exception as e:
         print(f"   ↪  Sidecar probe failed: {e}")
 
-    return rescued
+    # Main + sidecars download together instead of one after another
+    return stream_save_many(session, jobs)
 
 # —————————————————————————————
 # Sessions & rotation
@@ -408,14 +793,16 @@ HARD_ROTATE_ERRORS = (
     getattr(exceptions, "BadResponseException", exceptions.ConnectionException),
 )
 
+_COOKIE_KV_RX = re.compile(r"\s*([^=;]+?)\s*=\s*([^;]*?)\s*(?:;|$)")
+# "user|sid" (first "|"), else "user,sid" (first ","), else exactly "user sid"
+_SESSION_PAIR_RX = re.compile(
+    r"(?P<u1>[^|]*)\|(?P<s1>.*)"
+    r"|(?P<u2>[^,]*),(?P<s2>.*)"
+    r"|(?P<u3>\S+)\s+(?P<s3>\S+)"
+)
+
 def _parse_cookie_kv(s: str) -> Dict[str, str]:
-    out = {}
-    parts = [p.strip() for p in s.split(";") if p.strip()]
-    for p in parts:
-        if "=" in p:
-            k, v = p.split("=", 1)
-            out[k.strip()] = v.strip()
-    return out
+    return {k: v for k, v in _COOKIE_KV_RX.findall(s)}
 
 def _parse_sessions_line(line: str) -> Dict[str, Optional[str]]:
     line = line.strip()
@@ -429,21 +816,19 @@ def _parse_sessions_line(line: str) -> Dict[str, Optional[str]]:
             "csrftoken": kv.get("csrftoken"),
             "username": kv.get("ds_user") or kv.get("username")
         }
-    for sep in ["|", ","]:
-        if sep in line:
-            u, sid = [x.strip() for x in line.split(sep, 1)]
-            return {"sessionid": sid, "ds_user_id": None, "csrftoken": None, "username": u}
-    parts = line.split()
-    if len(parts) == 2:
-        return {"sessionid": parts[1].strip(), "ds_user_id": None, "csrftoken": None, "username": parts[0].strip()}
+    m = _SESSION_PAIR_RX.fullmatch(line)
+    if m:
+        g = m.groupdict()
+        for n in ("1", "2", "3"):
+            if g["s" + n] is not None:
+                return {"sessionid": g["s" + n].strip(), "ds_user_id": None, "csrftoken": None,
+                        "username": g["u" + n].strip()}
     return {"sessionid": line, "ds_user_id": None, "csrftoken": None, "username": None}
 
-def load_sessions() -> List[Dict[str, Optional[str]]]:
-    sessions_file = os.path.join(SCRIPT_DIR, "sessions.txt")
-    if not os.path.exists(sessions_file):
-        raise FileNotFoundError(f"No sessions.txt file found at: {sessions_file}")
+@functools.lru_cache(maxsize=4)
+def _load_sessions_cached(path: str, mtime_ns: int) -> Tuple[Dict[str, Optional[str]], ...]:
     entries = []
-    with open(sessions_file, "r", encoding="utf-8") as fh:
+    with open(path, "r", encoding="utf-8") as fh:
         for ln in fh:
             ln = ln.strip()
             if not ln or ln.startswith("#"):
@@ -451,6 +836,15 @@ def load_sessions() -> List[Dict[str, Optional[str]]]:
             info = _parse_sessions_line(ln)
             if info.get("sessionid"):
                 entries.append(info)
+    return tuple(entries)
+
+def load_sessions() -> List[Dict[str, Optional[str]]]:
+    sessions_file = os.path.join(SCRIPT_DIR, "sessions.txt")
+    try:
+        mtime_ns = os.stat(sessions_file).st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No sessions.txt file found at: {sessions_file}")
+    entries = list(_load_sessions_cached(sessions_file, mtime_ns))
     if not entries:
         raise RuntimeError("sessions.txt is empty or no valid sessionid found.")
     return entries
@@ -464,64 +858,233 @@ def _session_label(entry: Dict[str, Optional[str]]) -> str:
         return f"{sid[:3]}…{sid[-3:]}"
     return sid or "unknown"
 
+_IDENTITY_COOKIES = ("sessionid", "ds_user_id", "csrftoken")
+
+def _apply_session_cookies(s, entry: Dict[str, Optional[str]]):
+    """Swap the account cookies on an existing HTTP session (keeps pooled connections).
+
+    sessionid/ds_user_id always belong to the previous account and are dropped;
+    an anonymous csrftoken from the warmup request is kept unless the entry
+    brings its own.
+    """
+    drop = {"sessionid", "ds_user_id"} | {n for n in _IDENTITY_COOKIES if entry.get(n)}
+    for c in [c for c in s.cookies if c.name in drop]:
+        s.cookies.clear(c.domain, c.path, c.name)
+    for name in _IDENTITY_COOKIES:
+        if entry.get(name):
+            s.cookies.set(name, entry[name], domain=".instagram.com")
+
+def _tune_session(L: instaloader.Instaloader):
+    """Mount the keep-alive pool on L's requests.Session (no-op if already done).
+
+    Cheap to call after anything that may hand instaloader a fresh Session.
+    """
+    s = L.context._session
+    if getattr(s, "_igdl_tuned", False):
+        return
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=0)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers["Connection"] = "keep-alive"
+    s._igdl_tuned = True
+
+
 def make_loader(entry: Dict[str, Optional[str]]) -> instaloader.Instaloader:
     L = instaloader.Instaloader(
         download_pictures=True,
         download_videos=True,
         download_video_thumbnails=False,
-        save_metadata=DOWNLOAD_METADATA,
+        download_comments=False,
+        save_metadata=DOWNLOAD_METADATA and not MINIMAL_METADATA,
         post_metadata_txt_pattern=None,   # avoid .txt sidecars
         compress_json=False,              # save plain .json (no .json.xz)
         max_connection_attempts=3
     )
+    _tune_session(L)
     s = L.context._session
     try:
         s.get("https://www.instagram.com/", timeout=30)
     except Exception:
         pass
-    if entry.get("sessionid"):
-        s.cookies.set("sessionid", entry["sessionid"], domain=".instagram.com")
-    if entry.get("ds_user_id"):
-        s.cookies.set("ds_user_id", entry["ds_user_id"], domain=".instagram.com")
-    if entry.get("csrftoken"):
-        s.cookies.set("csrftoken", entry["csrftoken"], domain=".instagram.com")
+    _apply_session_cookies(s, entry)
     s.headers.update({
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124 Safari/537.36",
         "Referer": "https://www.instagram.com/"
     })
     return L
 
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens/s up to `burst`.
+
+    acquire(n) only sleeps when the bucket would go negative; the debt is
+    paid back by later refills. penalize()/reward() adapt `rate` AIMD-style
+    between `min_rate` and the initial rate. Thread-safe.
+    """
+    def __init__(self, rate: float, burst: float, min_rate: float = PACE_MIN_RATE,
+                 step: float = PACE_STEP, recover_after: int = PACE_RECOVER_AFTER):
+        self.rate = self.max_rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.step = float(step)
+        self.recover_after = max(1, int(recover_after))
+        self.burst = float(burst)
+        self.tokens = self.burst
+        self.stamp = time.monotonic()
+        self._streak = 0
+        self._lock = threading.Lock()
+
+    def penalize(self) -> float:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._streak = 0
+            return self.rate
+
+    def reward(self):
+        with self._lock:
+            self._streak += 1
+            if self._streak >= self.recover_after:
+                self._streak = 0
+                self.rate = min(self.max_rate, self.rate + self.step)
+
+    def acquire(self, n: float = 1.0):
+        if n <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
 class SessionManager:
-    """Manage current loader and rotate by time and on hard errors."""
+    """Manage current loader and rotate by time and on hard errors.
+
+    One loader (and its pooled requests.Session) lives for the whole run;
+    rotating only swaps the account cookies, so no TLS handshake or warmup
+    request is paid per rotation.
+
+    Time rotation is driven by a threading.Timer that only raises a flag;
+    maybe_time_rotate() is a flag test until the timer fires, and the swap
+    itself still happens on the calling thread between requests.
+    """
     def __init__(self, sessions: List[Dict[str, Optional[str]]], rotate_interval_sec: int = 120):
         self.sessions = sessions
         self.rotate_interval = max(10, int(rotate_interval_sec))
         self.idx = 0
         self.L = make_loader(self.sessions[self.idx])
         self.last_rotate = time.time()
+        # One pacing bucket per account (tokens = seconds of pacing): a penalty
+        # stays with the session that earned it instead of following rotation.
+        self._buckets = [TokenBucket(rate=1.0, burst=THROTTLE_BURST_SEC) for _ in self.sessions]
+        self._lock = threading.RLock()
+        self._rotate_due = threading.Event()
+        self._timer: Optional[threading.Timer] = None
+        self._last_sort_ts = 0.0
+        self._sort_interval = SORT_INTERVAL_SEC
+        self._profile_cache: Dict[str, Tuple[float, instaloader.Profile]] = {}
+        self._arm_timer()
         print(f"🔐 Using session: {_session_label(self.sessions[self.idx])}")
 
+    @property
+    def bucket(self) -> TokenBucket:
+        return self._buckets[self.idx]
+
+    def _arm_timer(self):
+        if len(self.sessions) <= 1:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.rotate_interval, self._rotate_due.set)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _advance(self) -> int:
+        old = self.idx
+        self.idx = (self.idx + 1) % len(self.sessions)
+        _tune_session(self.L)
+        _apply_session_cookies(self.L.context._session, self.sessions[self.idx])
+        self.last_rotate = time.time()
+        self._rotate_due.clear()
+        self._arm_timer()
+        return old
+
     def maybe_time_rotate(self):
-        now = time.time()
-        if now - self.last_rotate >= self.rotate_interval and len(self.sessions) > 1:
-            old = self.idx
-            self.idx = (self.idx + 1) % len(self.sessions)
-            self.L = make_loader(self.sessions[self.idx])
-            self.last_rotate = now
+        if not self._rotate_due.is_set():
+            return
+        with self._lock:
+            if not self._rotate_due.is_set():
+                return  # another thread already rotated
+            old = self._advance()
             print(f"   🔄 Time-rotate session: {_session_label(self.sessions[old])} → {_session_label(self.sessions[self.idx])}")
             _log_line(f"TIME_ROTATE {_session_label(self.sessions[old])} -> {_session_label(self.sessions[self.idx])}")
 
-    def rotate_on_error(self) -> bool:
+    def get_profile(self, name: str) -> instaloader.Profile:
+        """Profile.from_username, cached for PROFILE_CACHE_TTL_SEC.
+
+        Rotation only swaps cookies on the same loader, so a cached Profile's
+        context stays valid across rotations.
+        """
+        now = time.monotonic()
+        hit = self._profile_cache.get(name)
+        if hit is not None and now - hit[0] < PROFILE_CACHE_TTL_SEC:
+            return hit[1]
+        p = instaloader.Profile.from_username(self.L.context, name)
+        self._profile_cache[name] = (now, p)
+        return p
+
+    def _sort(self, base_path: str):
+        move_sorted(base_path)
+        _DIR_CACHE.invalidate(base_path, os.path.join(base_path, "media"))
+        self._last_sort_ts = time.monotonic()
+
+    def request_sort(self, base_path: str):
+        """Debounced move_sorted: runs at most every SORT_INTERVAL_SEC; flush_sort() catches up."""
+        with self._lock:
+            if time.monotonic() - self._last_sort_ts >= self._sort_interval:
+                self._sort(base_path)
+
+    def flush_sort(self, base_path: str):
+        with self._lock:
+            self._sort(base_path)
+
+    def rotate_on_error(self, failed_idx: Optional[int] = None) -> bool:
+        # failed_idx is the session the caller used (read before its request);
+        # threads that fail together on one session penalize and rotate it
+        # once, instead of each advancing past healthy sessions.
+        failed = self.idx if failed_idx is None else failed_idx
+        rate = self._buckets[failed].penalize()
+        _log_line(f"PACE_DOWN rate={rate:.3f}")
         if len(self.sessions) <= 1:
             return False
-        old = self.idx
-        self.idx = (self.idx + 1) % len(self.sessions)
-        self.L = make_loader(self.sessions[self.idx])
-        self.last_rotate = time.time()
-        print(f"   🔄 Error-rotate session: {_session_label(self.sessions[old])} → {_session_label(self.sessions[self.idx])}")
-        _log_line(f"ERROR_ROTATE {_session_label(self.sessions[old])} -> {_session_label(self.sessions[self.idx])}")
+        with self._lock:
+            if self.idx == failed:
+                self._advance()
+                print(f"   🔄 Error-rotate session: {_session_label(self.sessions[failed])} → {_session_label(self.sessions[self.idx])}")
+                _log_line(f"ERROR_ROTATE {_session_label(self.sessions[failed])} -> {_session_label(self.sessions[self.idx])}")
         return True
 
+class SessionPool:
+    """Hand out SessionManagers to concurrent profile workers.
+
+    Worker k owns sessions[k::workers] — its own loader and cookie jar — so
+    two profiles never run on the same account at once and each account
+    keeps its own rotation/delay budget.
+    """
+    def __init__(self, sessions: List[Dict[str, Optional[str]]], workers: int, rotate_interval_sec: int = 120):
+        self.size = max(1, min(int(workers), len(sessions)))
+        self._free: "queue.Queue[SessionManager]" = queue.Queue()
+        for k in range(self.size):
+            self._free.put(SessionManager(sessions[k::self.size], rotate_interval_sec=rotate_interval_sec))
+
+    @contextmanager
+    def lease(self):
+        sman = self._free.get()
+        try:
+            yield sman
+        finally:
+            self._free.put(sman)
+
 # —————————————————————————————
 # CLI parsing
 # —————————————————————————————
@@ -567,6 +1130,12 @@ def parse_cli():
         default=120,
         help="Seconds between automatic session rotations. Default 120s.",
     )
+    p.add_argument(
+        "--parallel-profiles",
+        type=int,
+        default=1,
+        help="Profiles processed concurrently, each on its own slice of sessions.txt. Default 1.",
+    )
     return p.parse_args()
 
 def parse_profiles_from_cli(args) -> List[str]:
@@ -603,37 +1172,93 @@ def parse_profiles_from_cli(args) -> List[str]:
 # Date filter + throttles
 # —————————————————————————————
 
-def _safe_sleep_backoff(attempt: int):
-    delay = min(BACKOFF_BASE_SEC * (2 ** max(0, attempt - 1)), BACKOFF_CAP_SEC)
-    print(f"   ⏳ Backoff {delay}s (attempt {attempt}) …")
+def _retry_after_sec(e: BaseException) -> float:
+    """Seconds from a Retry-After header on e (or the error it wraps), else 0."""
+    for exc in (e, e.__cause__, e.__context__):
+        resp = getattr(exc, "response", None)
+        value = getattr(resp, "headers", {}).get("Retry-After") if resp is not None else None
+        if not value:
+            continue
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (AttributeError, TypeError, ValueError):
+                pass
+    return 0.0
+
+def _safe_sleep_backoff(attempt: int, min_delay: float = 0.0):
+    # Full jitter: uniform over [0, exponential ceiling] so rotated workers
+    # don't retry in lockstep; a server-sent Retry-After is the floor.
+    ceiling = min(BACKOFF_BASE_SEC * (2 ** min(max(0, attempt - 1), 6)), BACKOFF_CAP_SEC)
+    delay = max(min_delay, random.uniform(0, ceiling))
+    print(f"   ⏳ Backoff {delay:.0f}s (attempt {attempt}) …")
     time.sleep(delay)
 
-def _post_passes_date_filter(post) -> bool:
-    if DATE_AFTER_UTC is None and DATE_BEFORE_UTC is None:
-        return True
-    pdt = getattr(post, "date_utc", None)
-    if pdt is None:
-        return True
-    if pdt.tzinfo is None:
-        pdt = pdt.replace(tzinfo=timezone.utc)
+def _make_date_filter(after: Optional[datetime], before: Optional[datetime]) -> Callable[[object], bool]:
+    """Build the --after/--before check once; compares the post's cached epoch_us.
+
+    Undated posts (epoch_us 0) always pass.
+    """
+    if after is None and before is None:
+        return lambda post: True
+    lo = _epoch_us(after) if after is not None else None
+    hi = _epoch_us(before) if before is not None else None
+
+    if hi is None:
+        def passes(post) -> bool:
+            us = post_ident(post)[0]
+            return not us or us > lo
+    elif lo is None:
+        def passes(post) -> bool:
+            us = post_ident(post)[0]
+            return not us or us < hi
     else:
-        pdt = pdt.astimezone(timezone.utc)
-    if DATE_AFTER_UTC and pdt <= DATE_AFTER_UTC:
-        return False
-    if DATE_BEFORE_UTC and pdt >= DATE_BEFORE_UTC:
-        return False
-    return True
+        def passes(post) -> bool:
+            us = post_ident(post)[0]
+            return not us or lo < us < hi
+    return passes
+
+
+# Rebound in main() once --after/--before are known.
+_post_passes_date_filter = _make_date_filter(None, None)
 
 # —————————————————————————————
 # Download helpers
 # —————————————————————————————
 
+# Fire-and-forget file writes nothing later in the run waits on; drained at exit.
+_IO_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="io")
+atexit.register(_IO_POOL.shutdown)
+
+
+def _write_json_quiet(path: str, obj):
+    try:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(obj, fh, separators=(",", ":"))
+    except Exception:
+        pass
+
+
+def _write_min_metadata(meta_dir: str, post):
+    basename, shortcode, ts_iso = get_post_identifiers(post)
+    path = os.path.join(meta_dir, f"{basename}.json")
+    _IO_POOL.submit(_write_json_quiet, path, {"shortcode": shortcode, "date_utc": ts_iso})
+
+
 def _download_one_post(sman: "SessionManager", post, base_path: str) -> Tuple[bool, int]:
     sman.maybe_time_rotate()
     L = sman.L
-    media_dir, _ = ensure_dirs_for_profile(base_path)
+    media_dir, meta_dir = ensure_dirs_for_profile(base_path)
     rescued = 0
 
+    def finish():
+        sman.request_sort(base_path)
+        _DIR_CACHE.invalidate(base_path, media_dir)
+        if MINIMAL_METADATA:
+            _write_min_metadata(meta_dir, post)
+
     def try_fallback_video():
         nonlocal rescued
         basename, shortcode, _ = get_post_identifiers(post)
@@ -647,6 +1272,7 @@ def _download_one_post(sman: "SessionManager", post, base_path: str) -> Tuple[bo
         try:
             if hasattr(post, "get_sidecar_nodes"):
                 nodes = list(post.get_sidecar_nodes())
+                jobs = []
                 for i, node in enumerate(nodes):
                     if getattr(node, "is_video", False) and getattr(node, "video_url", None):
                         side_name = f"{basename}_{i+1}.mp4"
@@ -654,38 +1280,39 @@ def _download_one_post(sman: "SessionManager", post, base_path: str) -> Tuple[bo
                         side_in_base  = os.path.join(base_path,  side_name)
                         if not (os.path.exists(side_in_media) or os.path.exists(side_in_base)):
                             print(f"   ↪️  Direct sidecar fallback [{i+1}] → {side_name}")
-                            if stream_save(L.context._session, node.video_url, side_in_media):
-                                rescued += 1
+                            jobs.append((node.video_url, side_in_media))
+                rescued += stream_save_many(L.context._session, jobs)
         except Exception:
             pass
         return False
 
     for attempt in range(1, MAX_RETRIES_POST + 1):
+        idx = sman.idx
         try:
             L.download_post(post, target=base_path)
             rescued += ensure_post_videos(L, post, media_dir, base_path)
-            move_sorted(base_path)
+            finish()
             return True, rescued
 
         except HARD_ROTATE_ERRORS as e:
             if "500 Internal Server Error" in str(e) or "BadResponse" in type(e).__name__:
                 if try_fallback_video():
-                    move_sorted(base_path)
+                    finish()
                     return True, rescued
             print(f"   🚧 Post error: {e}")
             _log_line(f"POST_ERROR {type(e).__name__}: {e}")
-            if sman.rotate_on_error():
-                _safe_sleep_backoff(min(attempt, 3))
+            if sman.rotate_on_error(idx):
+                _safe_sleep_backoff(min(attempt, 3), _retry_after_sec(e))
                 continue
             if attempt < MAX_RETRIES_POST:
-                _safe_sleep_backoff(attempt)
+                _safe_sleep_backoff(attempt, _retry_after_sec(e))
                 continue
             return False, rescued
 
         except Exception as e:
             if "500 Internal Server Error" in str(e) or "Internal Server Error" in str(e):
                 if try_fallback_video():
-                    move_sorted(base_path)
+                    finish()
                     return True, rescued
             print(f"   ❗ Unexpected post error: {e}")
             if attempt < MAX_RETRIES_POST:
@@ -708,21 +1335,22 @@ def download_posts_iter(kind: str, iterable: Iterable, sman: "SessionManager", b
 
     stream = "feed" if kind == "feed" else ("reels" if kind == "reels" else kind)
     marker = load_marker(meta_dir, stream)
-    max_seen: Optional[Tuple[str, str]] = marker  # (ts_iso, shortcode)
-    top_ident_seen: Optional[Tuple[str, str]] = None
+    seen = seen_set(meta_dir)
+    max_seen: Optional[Tuple[int, str]] = marker  # (epoch_us, shortcode)
+    top_ident_seen: Optional[Tuple[int, str]] = None
 
     downloaded_this_run = 0
     consec_seen = 0
 
     for post in iterable:  # newest → oldest
-        time.sleep(ITER_THROTTLE_SEC)
+        sman.bucket.acquire(ITER_THROTTLE_SEC)
         sman.maybe_time_rotate()
 
         if not _post_passes_date_filter(post):
             continue
 
-        basename, shortcode, ts_iso = get_post_identifiers(post)
-        ident = ident_tuple(ts_iso, shortcode)
+        basename, shortcode, _ = get_post_identifiers(post)
+        ident = post_ident(post)
         if top_ident_seen is None or ident > top_ident_seen:
             top_ident_seen = ident  # remember the newest we *saw* during enumeration
 
@@ -738,30 +1366,37 @@ def download_posts_iter(kind: str, iterable: Iterable, sman: "SessionManager", b
             else:
                 consec_seen = 0  # encountering newer content resets streak
 
-        # Log/disk guards (fast skip)
-        if already_logged_wrapper(post, media_dir):
-            if is_daily and downloaded_this_run == 0:
-                consec_seen += 1
-                if consec_seen >= CONSEC_SEEN_STOP:
-                    break
-            continue
-
-        if any_media_exists_for_post([base_path, media_dir], shortcode, basename):
+        # Seen-set/log/disk guards (fast skip)
+        if shortcode in seen or already_logged_wrapper(post, media_dir) \
+                or any_media_exists_for_post([base_path, media_dir], shortcode, basename):
+            if shortcode != "unknown":
+                seen.add(shortcode)
             if is_daily and downloaded_this_run == 0:
                 consec_seen += 1
                 if consec_seen >= CONSEC_SEEN_STOP:
                     break
             continue
 
-        ok, rescued = _download_one_post(sman, post, base_path)
+        if not _claim_post(shortcode):
+            continue  # the other stream is downloading this very post
+        try:
+            ok, rescued = _download_one_post(sman, post, base_path)
+        finally:
+            _release_post(shortcode)
         if ok:
+            index = _LOG_INDEXES.get(media_dir)
+            if index is not None:
+                index.add(basename, shortcode)
+            if shortcode != "unknown":
+                seen.add(shortcode)
             count += 1
             rescued_total += rescued
             downloaded_this_run += 1
             consec_seen = 0
             if max_seen is None or ident > max_seen:
                 max_seen = ident
-            time.sleep(PER_POST_SLEEP)
+            sman.bucket.reward()
+            sman.bucket.acquire(PER_POST_SLEEP)
 
     # Persist marker:
     # - If we advanced via actual downloads, persist max_seen.
@@ -781,77 +1416,95 @@ def download_posts_iter(kind: str, iterable: Iterable, sman: "SessionManager", b
 
 def download_stories(profile: instaloader.Profile, sman: "SessionManager", base_path: str) -> int:
     count = 0
-    ensure_dirs_for_profile(base_path)
+    _, meta_dir = ensure_dirs_for_profile(base_path)
+    seen = seen_set(meta_dir)
     for attempt in range(1, MAX_RETRIES_POST + 1):
         try:
             sman.maybe_time_rotate()
+            idx = sman.idx
             L = sman.L
-            for story in L.get_stories(userids=[profile.userid]):
-                for item in story.get_items():
-                    for a2 in range(1, MAX_RETRIES_POST + 1):
-                        try:
-                            sman.maybe_time_rotate()
-                            L.download_storyitem(item, target=os.path.join(base_path, "stories"))
-                            count += 1
-                            move_sorted(base_path)
-                            break
-                        except HARD_ROTATE_ERRORS as e:
-                            if sman.rotate_on_error():
-                                _safe_sleep_backoff(min(a2, 3))
-                                continue
-                            if a2 < MAX_RETRIES_POST:
-                                _safe_sleep_backoff(a2)
-                                continue
-                            break
-                        except Exception:
-                            break
+            target_dir = os.path.join(base_path, "stories")
+            with ThreadPoolExecutor(max_workers=max(1, STORYITEM_WORKERS)) as pool:
+                for story in L.get_stories(userids=[profile.userid]):
+                    futures = [pool.submit(_download_one_storyitem, item, target_dir, sman, seen,
+                                           f"story/{getattr(item, 'shortcode', '')}")
+                               for item in story.get_items()]
+                    count += sum(1 for fut in as_completed(futures) if fut.result())
+                    sman.request_sort(base_path)
             break
         except HARD_ROTATE_ERRORS as e:
-            if sman.rotate_on_error():
-                _safe_sleep_backoff(min(attempt, 3))
+            if sman.rotate_on_error(idx):
+                _safe_sleep_backoff(min(attempt, 3), _retry_after_sec(e))
                 continue
             if attempt < MAX_RETRIES_POST:
-                _safe_sleep_backoff(attempt)
+                _safe_sleep_backoff(attempt, _retry_after_sec(e))
                 continue
             break
         except Exception:
             break
     return count
 
+_TITLE_FORBIDDEN = frozenset('\\/:*?"<>|')
+_TITLE_FORBIDDEN_RUN_RX = re.compile(r"[\\/:*?\"<>|]+")
+
 def _sanitize_title(s: str) -> str:
     s = s or ""
-    s = re.sub(r"[\\/:*?\"<>|]+", "_", s).strip()
-    s = re.sub(r"\s+", " ", s)
+    # A run of forbidden chars becomes one "_" (str.translate can't collapse
+    # runs, and changing that would rename existing highlight folders).
+    if not _TITLE_FORBIDDEN.isdisjoint(s):
+        s = _TITLE_FORBIDDEN_RUN_RX.sub("_", s)
+    s = " ".join(s.split())
     return s or "untitled"
 
+def _with_retries(fn, sman: "SessionManager") -> bool:
+    """Run one paced request with the shared rotate/backoff ladder; True on success."""
+    for attempt in range(1, MAX_RETRIES_POST + 1):
+        try:
+            sman.maybe_time_rotate()
+            idx = sman.idx
+            sman.bucket.acquire(ITER_THROTTLE_SEC)
+            fn()
+        except HARD_ROTATE_ERRORS as e:
+            if sman.rotate_on_error(idx):
+                _safe_sleep_backoff(min(attempt, 3), _retry_after_sec(e))
+            elif attempt < MAX_RETRIES_POST:
+                _safe_sleep_backoff(attempt, _retry_after_sec(e))
+            else:
+                return False
+        except Exception:
+            return False
+        else:
+            sman.bucket.reward()
+            return True
+    return False
+
+
+def _download_one_storyitem(item, target_dir: str, sman: "SessionManager", seen: set, key: str) -> bool:
+    if key in seen:
+        return False
+    if not _with_retries(lambda: sman.L.download_storyitem(item, target=target_dir), sman):
+        return False
+    seen.add(key)
+    return True
+
+
 def download_highlights(profile: instaloader.Profile, sman: "SessionManager", base_path: str) -> int:
     count = 0
+    seen = seen_set(os.path.join(base_path, "metadata"))
     try:
         sman.maybe_time_rotate()
-        L = sman.L
-        for hl in profile.get_highlights():
-            title = _sanitize_title(getattr(hl, "title", "") or f"highlight_{hl.unique_id}")
-            target_dir = os.path.join(base_path, "highlights", title)
-            os.makedirs(target_dir, exist_ok=True)
-            for item in hl.get_items():
-                for attempt in range(1, MAX_RETRIES_POST + 1):
-                    try:
-                        sman.maybe_time_rotate()
-                        L.download_storyitem(item, target=target_dir)
-                        count += 1
-                        move_sorted(base_path)
-                        break
-                    except HARD_ROTATE_ERRORS as e:
-                        if sman.rotate_on_error():
-                            _safe_sleep_backoff(min(attempt, 3))
-                            continue
-                        if attempt < MAX_RETRIES_POST:
-                            _safe_sleep_backoff(attempt)
-                            continue
-                        else:
-                            break
-                    except Exception:
-                        break
+        # Story items are independent CDN fetches; overlap them within each
+        # highlight and sort the folder once the batch is on disk.
+        with ThreadPoolExecutor(max_workers=max(1, STORYITEM_WORKERS)) as pool:
+            for hl in profile.get_highlights():
+                title = _sanitize_title(getattr(hl, "title", "") or f"highlight_{hl.unique_id}")
+                target_dir = os.path.join(base_path, "highlights", title)
+                os.makedirs(target_dir, exist_ok=True)
+                futures = [pool.submit(_download_one_storyitem, item, target_dir, sman, seen,
+                                       f"hl/{title}/{getattr(item, 'shortcode', '')}")
+                           for item in hl.get_items()]
+                count += sum(1 for fut in as_completed(futures) if fut.result())
+                sman.request_sort(base_path)
     except Exception:
         pass
     return count
@@ -860,115 +1513,177 @@ def download_highlights(profile: instaloader.Profile, sman: "SessionManager", ba
 # Probes (bounded retries; no infinite 403 spam)
 # —————————————————————————————
 
+_PROBE_FAILED = object()
+
+
 def _probe_iter(it):
-    # Pull just one item to ensure the iterator is alive.
+    # Pull just one item to ensure the iterator is alive; hand it back so the walk can reuse it.
     try:
-        next(it)
-        return True
+        return [next(it)]
     except StopIteration:
-        return True  # empty but not failing
+        return []  # empty but not failing
     except Exception:
-        return False
+        return _PROBE_FAILED
 
-def _bounded_probe(name: str, it_factory, sman: "SessionManager", tries: int = 4) -> bool:
-    """Try to touch an iterator with bounded retries and rotation."""
+def _bounded_probe(name: str, it_factory, sman: "SessionManager", tries: int = 4) -> Optional[Iterable]:
+    """Try to touch an iterator with bounded retries and rotation.
+       Returns the live iterator (first item re-attached) or None when blocked."""
     for i in range(1, tries + 1):
         sman.maybe_time_rotate()
+        idx = sman.idx
         try:
             it = it_factory()
-            ok = _probe_iter(it)
-            if ok:
-                return True
+            head = _probe_iter(it)
+            if head is not _PROBE_FAILED:
+                return itertools.chain(head, it)
         except (exceptions.TooManyRequestsException,
                 getattr(exceptions, "QueryReturnedForbiddenException", exceptions.ConnectionException),
                 exceptions.BadResponseException,
                 exceptions.ConnectionException) as e:
             print(f"   🚧 {name} probe 403/err: {e} | try {i}/{tries}")
             _log_line(f"{name.upper()}_PROBE_ERROR {type(e).__name__}: {e}")
-            if sman.rotate_on_error():
-                _safe_sleep_backoff(min(i, 3))
+            if sman.rotate_on_error(idx):
+                _safe_sleep_backoff(min(i, 3), _retry_after_sec(e))
                 continue
-            _safe_sleep_backoff(i)
+            _safe_sleep_backoff(i, _retry_after_sec(e))
         except Exception as e:
             print(f"   ❗ {name} probe unexpected: {e} | try {i}/{tries}")
             _safe_sleep_backoff(i)
     print(f"   ⚠️ {name} probe failed repeatedly (403/blocked). Skipping {name.upper()} for this profile.")
-    return False
+    return None
 
 # —————————————————————————————
 # Profile processing
 # —————————————————————————————
 
+_STREAM_LABELS = {"feed": "FEED posts", "reels": "REELS"}
+_INFLIGHT_POSTS: set = set()
+_INFLIGHT_LOCK = threading.Lock()
+
+
+def _claim_post(shortcode: str) -> bool:
+    """Reserve a shortcode while feed and reels run side by side (a reel is also a feed post)."""
+    with _INFLIGHT_LOCK:
+        if shortcode in _INFLIGHT_POSTS:
+            return False
+        _INFLIGHT_POSTS.add(shortcode)
+        return True
+
+
+def _release_post(shortcode: str):
+    with _INFLIGHT_LOCK:
+        _INFLIGHT_POSTS.discard(shortcode)
+
+
+def _run_post_stream(name: str, factory, sman: "SessionManager", base_path: str) -> Tuple[int, int]:
+    """Probe one post stream, walk it, or seed its marker from disk if the probe is blocked."""
+    print(f"📌 Downloading {_STREAM_LABELS.get(name, name)}…")
+    it = _bounded_probe(name, factory, sman)
+    if it is not None:
+        return download_posts_iter(name, it, sman, base_path)
+    media_dir, meta_dir = ensure_dirs_for_profile(base_path)
+    # Seed marker from disk if none exists
+    if load_marker(meta_dir, name) is None:
+        disk_top = _find_newest_from_disk(media_dir)
+        if disk_top:
+            debug_save_marker(meta_dir, name, disk_top[0], disk_top[1], "seed from disk (probe blocked)")
+    return 0, 0
+
+
+class ProfileRunState:
+    """Counts that survive process_profile's retry loop (one object, not five locals)."""
+    __slots__ = ("feed", "reels", "stories", "highlights", "rescued", "attempts")
+
+    def __init__(self):
+        self.feed = self.reels = self.stories = self.highlights = self.rescued = 0
+        self.attempts = 0
+
+    def totals(self) -> Tuple[int, int, int, int, int]:
+        return self.feed, self.reels, self.stories, self.highlights, self.rescued
+
+
 def process_profile(sman: "SessionManager", profile_name: str, mode: str, base_path: str,
                     feed_only: bool, reels_only: bool, stories_only: bool, highlights_only: bool):
-    attempts = 0
-    feed_count = reels_count = stories_count = highlights_count = rescued_count = 0
+    try:
+        return _process_profile(sman, profile_name, mode, base_path,
+                                feed_only, reels_only, stories_only, highlights_only)
+    finally:
+        sman.flush_sort(base_path)  # whatever request_sort deferred
+        save_seen(os.path.join(base_path, "metadata"))
+
+def _process_profile(sman: "SessionManager", profile_name: str, mode: str, base_path: str,
+                     feed_only: bool, reels_only: bool, stories_only: bool, highlights_only: bool):
+    st = ProfileRunState()
 
     while True:
-        attempts += 1
+        st.attempts += 1
         try:
             sman.maybe_time_rotate()
-            p = instaloader.Profile.from_username(sman.L.context, profile_name)
+            p = sman.get_profile(profile_name)
 
             media_dir, meta_dir = ensure_dirs_for_profile(base_path)
+            build_log_index(media_dir)
             backfill_log_from_disk(media_dir)
 
-            # FEED
+            get_posts = p.get_posts
+            get_reels = getattr(p, "get_reels", None)  # absent on older instaloader
+
+            streams = []
             if not reels_only and not stories_only and not highlights_only:
-                print("📌 Downloading FEED posts…")
-                probe_ok = _bounded_probe("feed", lambda: p.get_posts(), sman)
-                if probe_ok:
-                    fc, r = download_posts_iter("feed", p.get_posts(), sman, base_path)
-                    feed_count += fc; rescued_count += r
-                else:
-                    # Seed marker from disk if none exists
-                    if load_marker(meta_dir, "feed") is None:
-                        disk_top = _find_newest_from_disk(media_dir)
-                        if disk_top:
-                            debug_save_marker(meta_dir, "feed", disk_top[0], disk_top[1], "seed from disk (probe blocked)")
-
-            # REELS
-            if (mode in ("daily", "init") and not feed_only) or reels_only:
-                if hasattr(p, "get_reels"):
-                    print("📌 Downloading REELS…")
-                    probe_ok = _bounded_probe("reels", lambda: p.get_reels(), sman)
-                    if probe_ok:
-                        rc, r = download_posts_iter("reels", p.get_reels(), sman, base_path)
-                        reels_count += rc; rescued_count += r
-                    else:
-                        if load_marker(meta_dir, "reels") is None:
-                            disk_top = _find_newest_from_disk(media_dir)
-                            if disk_top:
-                                debug_save_marker(meta_dir, "reels", disk_top[0], disk_top[1], "seed from disk (probe blocked)")
+                streams.append(("feed", get_posts))
+            if ((mode in ("daily", "init") and not feed_only) or reels_only) and get_reels is not None:
+                streams.append(("reels", get_reels))
+
+            # FEED + REELS: disjoint endpoints, so overlap them when both run.
+            if len(streams) > 1:
+                with ThreadPoolExecutor(max_workers=len(streams)) as pool:
+                    jobs = [(name, pool.submit(_run_post_stream, name, factory, sman, base_path))
+                            for name, factory in streams]
+                results = []
+                for name, fut in jobs:
+                    try:
+                        results.append((name, fut.result()))
+                    except Exception as e:
+                        results.append((name, e))
+            else:
+                results = [(name, _run_post_stream(name, factory, sman, base_path))
+                           for name, factory in streams]
+            for name, res in results:
+                if isinstance(res, Exception):
+                    continue
+                setattr(st, name, getattr(st, name) + res[0])
+                st.rescued += res[1]
+            for name, res in results:
+                if isinstance(res, Exception):
+                    raise res
 
             # STORIES
             if mode in ("all",) or stories_only:
                 print("📌 Downloading STORIES…")
-                stories_count += download_stories(p, sman, base_path)
+                st.stories += download_stories(p, sman, base_path)
 
             # HIGHLIGHTS
             if mode in ("all",) or highlights_only:
                 print("📌 Downloading HIGHLIGHTS…")
-                highlights_count += download_highlights(p, sman, base_path)
+                st.highlights += download_highlights(p, sman, base_path)
 
-            move_sorted(base_path)
-            return feed_count, reels_count, stories_count, highlights_count, rescued_count
+            return st.totals()
 
         except HARD_ROTATE_ERRORS as e:
             print(f"   🚧 Hard error on profile '{profile_name}': {e}")
             _log_line(f"profile={profile_name} | HARD_ERROR={type(e).__name__}: {e}")
-            if sman.rotate_on_error() and attempts < MAX_RETRIES_PROFILE:
-                _safe_sleep_backoff(min(attempts, 3))
+            if sman.rotate_on_error() and st.attempts < MAX_RETRIES_PROFILE:
+                _safe_sleep_backoff(min(st.attempts, 3), _retry_after_sec(e))
                 continue
             print("   ❌ Could not recover via rotation/retries for this profile.")
-            return feed_count, reels_count, stories_count, highlights_count, rescued_count
+            return st.totals()
         except exceptions.PrivateProfileNotFollowedException:
             print(f"   🔒 Private profile (not followed): {profile_name}. Skipping.")
-            return feed_count, reels_count, stories_count, highlights_count, rescued_count
+            return st.totals()
         except Exception as e:
             print(f"   ❗ Error in profile '{profile_name}': {e}")
             _log_line(f"profile={profile_name} | ERROR={type(e).__name__}: {e}")
-            return feed_count, reels_count, stories_count, highlights_count, rescued_count
+            return st.totals()
 
 # —————————————————————————————
 # Main
@@ -977,7 +1692,8 @@ def process_profile(sman: "SessionManager", profile_name: str, mode: str, base_p
 CURRENT_MODE = "daily"  # set during main()
 
 def main():
-    global CURRENT_MODE, DATE_AFTER_UTC, DATE_BEFORE_UTC, DOWNLOAD_METADATA
+    global CURRENT_MODE, DATE_AFTER_UTC, DATE_BEFORE_UTC, DOWNLOAD_METADATA, MINIMAL_METADATA
+    global _post_passes_date_filter
 
     initial_cleanup()
     os.makedirs("downloads", exist_ok=True)
@@ -988,14 +1704,16 @@ def main():
     if args.media_only:
         DOWNLOAD_METADATA = False
         print("   🎯 Media-only mode: metadata downloads disabled.")
+    MINIMAL_METADATA = DOWNLOAD_METADATA and args.mode == "daily"
 
     if args.after:
         DATE_AFTER_UTC = _parse_dt_utc(args.after)
     if args.before:
         DATE_BEFORE_UTC = _parse_dt_utc(args.before)
+    _post_passes_date_filter = _make_date_filter(DATE_AFTER_UTC, DATE_BEFORE_UTC)
 
     sessions = load_sessions()
-    sman = SessionManager(sessions, rotate_interval_sec=args.rotate_interval)
+    pool = SessionPool(sessions, args.parallel_profiles, rotate_interval_sec=args.rotate_interval)
 
     profiles = parse_profiles_from_cli(args)
 
@@ -1008,10 +1726,9 @@ def main():
         _log_line(f"DATE_BEFORE_UTC={DATE_BEFORE_UTC.isoformat()}")
     _log_line(f"rotate_interval={args.rotate_interval}s")
     _log_line(f"media_only={args.media_only}")
+    _log_line(f"parallel_profiles={pool.size}")
 
-    total_feed = total_reels = total_stories = total_highlights = total_rescued = 0
-
-    for profile in profiles:
+    def run_profile(profile: str) -> Tuple[int, int, int, int, int]:
         print(f"\n📥 Processing: {profile} [{args.mode}]")
         if DATE_AFTER_UTC or DATE_BEFORE_UTC:
             a = DATE_AFTER_UTC.strftime('%Y-%m-%d %H:%M UTC') if DATE_AFTER_UTC else ''
@@ -1021,21 +1738,37 @@ def main():
         os.makedirs(base_path, exist_ok=True)
         ensure_dirs_for_profile(base_path)
 
-        fc, rc, sc, hc, rsc = process_profile(
-            sman,
-            profile,
-            args.mode,
-            base_path,
-            feed_only=args.feed_only,
-            reels_only=args.reels_only,
-            stories_only=args.stories_only,
-            highlights_only=args.highlights_only,
-        )
+        with pool.lease() as sman:
+            try:
+                fc, rc, sc, hc, rsc = process_profile(
+                    sman,
+                    profile,
+                    args.mode,
+                    base_path,
+                    feed_only=args.feed_only,
+                    reels_only=args.reels_only,
+                    stories_only=args.stories_only,
+                    highlights_only=args.highlights_only,
+                )
+            except Exception as e:
+                # Keep the other workers (and the run totals) going.
+                print(f"   ❗ {profile} failed: {e}")
+                _log_line(f"PROFILE_ERROR profile={profile} {type(e).__name__}: {e}")
+                fc = rc = sc = hc = rsc = 0
 
         _log_line(
             f"profile={profile} | feed={fc} | reels={rc} | stories={sc} | highlights={hc} | rescued={rsc}"
         )
+        return fc, rc, sc, hc, rsc
+
+    if pool.size > 1:
+        with ThreadPoolExecutor(max_workers=pool.size) as workers:
+            results = list(workers.map(run_profile, profiles))
+    else:
+        results = [run_profile(profile) for profile in profiles]
 
+    total_feed = total_reels = total_stories = total_highlights = total_rescued = 0
+    for fc, rc, sc, hc, rsc in results:
         total_feed += fc
         total_reels += rc
         total_stories += sc
@@ -4,8 +4,12 @@ import re
 import sys
 import time
 import math
+import random
 import shutil
 import argparse
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 # ——— Ensure we run relative to this script's folder (so moving the whole root works) ———
@@ -20,13 +24,16 @@ from instaloader import exceptions
 # —————————————————————————————
 # 0) CONFIG
 # —————————————————————————————
-PER_POST_SLEEP = 2.0  # seconds between posts to reduce 429s
+POSTS_PER_HOUR = 180   # per-session hourly post budget, refilled continuously (one post / 20s)
+POST_BURST     = 120   # share of that budget a fresh/idle session may spend before the refill rate applies
+POST_MIN_GAP   = 2.0   # seconds between posts on one session even while budget is left
 MEDIA_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".mp4", ".mov"}
 META_EXTS  = {".txt", ".json", ".xz", ".xml", ".log"}  # .json.xz ends with .xz
 BACKOFF_BASE_SEC = 120   # 2m
 BACKOFF_CAP_SEC  = 900   # 15m
 MAX_RETRIES_PROFILE = 6  # backoff attempts for a throttled profile
 MAX_RETRIES_POST    = 2  # attempts per post
+FALLBACK_WORKERS    = 4  # concurrent fallback video fetches per post
 
 # >>> PINNED POSTS HANDLING <<<
 # Allow skipping this many already-seen posts at the very top (likely pinned/old).
@@ -39,36 +46,52 @@ ROTATE_EVERY_POSTS = 12
 # —————————————————————————————
 # 1) CLEANUP: Fix any misnamed folders at root & under downloads/
 # —————————————————————————————
+def _safe_move(job):
+    src, dst, msg = job
+    try:
+        shutil.move(src, dst)
+        return msg
+    except Exception:
+        return None
+
 def initial_cleanup():
+    jobs = []
+    claimed = set()  # destinations already taken by an earlier pair
+
     # Some runs created "downloads﹨<profile>" (unicode small reverse solidus)
     if os.path.exists("downloads"):
-        for folder in os.listdir("downloads"):
-            if "﹨" in folder:
-                parts = folder.split("﹨", 1)
-                profile = parts[1] if len(parts) > 1 else folder.replace("﹨", "")
-                wrong = os.path.join("downloads", folder)
-                correct = os.path.join("downloads", profile)
-                if not os.path.exists(correct):
-                    try:
-                        shutil.move(wrong, correct)
-                        print(f"🧹 Fixed '{folder}' → '{profile}' inside downloads/")
-                    except Exception:
-                        pass
-
-    for item in os.listdir("."):
-        if os.path.isdir(item) and "﹨" in item:
-            parts = item.split("﹨", 1)
-            if parts[0] == "downloads":
-                profile = parts[1] if len(parts) > 1 else item.replace("downloads﹨", "")
-                os.makedirs("downloads", exist_ok=True)
-                src = item
-                dst = os.path.join("downloads", profile)
-                if not os.path.exists(dst):
-                    try:
-                        shutil.move(src, dst)
-                        print(f"🧹 Moved root '{src}' → '{dst}'")
-                    except Exception:
-                        pass
+        with os.scandir("downloads") as it:
+            folders = [e.name for e in it if "﹨" in e.name]
+        for folder in folders:
+            parts = folder.split("﹨", 1)
+            profile = parts[1] if len(parts) > 1 else folder.replace("﹨", "")
+            wrong = os.path.join("downloads", folder)
+            correct = os.path.join("downloads", profile)
+            if correct not in claimed and not os.path.exists(correct):
+                claimed.add(correct)
+                jobs.append((wrong, correct, f"🧹 Fixed '{folder}' → '{profile}' inside downloads/"))
+
+    with os.scandir(".") as it:
+        misplaced = [e.name for e in it if "﹨" in e.name and e.is_dir()]
+    for item in misplaced:
+        parts = item.split("﹨", 1)
+        if parts[0] == "downloads":
+            profile = parts[1] if len(parts) > 1 else item.replace("downloads﹨", "")
+            os.makedirs("downloads", exist_ok=True)
+            src = item
+            dst = os.path.join("downloads", profile)
+            if dst not in claimed and not os.path.exists(dst):
+                claimed.add(dst)
+                jobs.append((src, dst, f"🧹 Moved root '{src}' → '{dst}'"))
+
+    if not jobs:
+        return
+    # Folder moves are independent; messages are printed after the pool joins.
+    with ThreadPoolExecutor(max_workers=min(4, len(jobs))) as pool:
+        done = list(pool.map(_safe_move, jobs))
+    for msg in done:
+        if msg:
+            print(msg)
 
 # —————————————————————————————
 # 2) SESSIONS (multi-session rotation)
@@ -84,14 +107,16 @@ def _parse_session_line(line: str) -> str:
     s = line.strip()
     if not s:
         return ""
-    if "|" in s:  # username|sessionid
-        parts = s.split("|", 1)
-        return parts[1].strip()
-    if "sessionid=" in s:
+    _user, sep, sid = s.partition("|")  # username|sessionid
+    if sep:
+        return sid.strip()
+    i = s.find("sessionid=")
+    if i != -1:
         # pull value between sessionid= and ; or end
-        m = re.search(r"sessionid=([^;]+)", s)
-        if m:
-            return m.group(1).strip()
+        i += len("sessionid=")
+        j = s.find(";", i)
+        if j != i and i < len(s):
+            return s[i:j if j != -1 else None].strip()
     return s
 
 def load_sessions():
@@ -221,44 +246,178 @@ def ensure_dirs_for_profile(base_path: str):
     os.makedirs(meta_path,  exist_ok=True)
     return media_path, meta_path
 
+def _node_ts(edge):
+    node = edge.get("node") or {}
+    return node.get("taken_at_timestamp") or node.get("taken_at")
+
+def iter_posts_windowed(it, before_dt):
+    """Walk a get_posts() iterator; with --before set, skip the rest of a fetched
+    page without building Post objects once every remaining node on it is newer
+    than the window. Pages still come in cursor order; callers keep their own
+    window checks."""
+    if before_dt is None or not all(hasattr(it, a) for a in ("_data", "_page_index", "_total_index")):
+        yield from it
+        return
+    before_ts = before_dt.timestamp()
+    while True:
+        try:
+            post = next(it)
+        except StopIteration:
+            return
+        edges = (it._data or {}).get("edges") or []
+        rest = edges[it._page_index:]
+        stamps = [_node_ts(e) for e in rest]
+        if rest and all(ts and ts > before_ts for ts in stamps):
+            it._page_index = len(edges)
+            it._total_index += len(rest)
+        yield post
+
+# dir -> (st_mtime_ns, names); a new file bumps the dir mtime, writers also invalidate explicitly
+_dir_cache = {}
+
+def _cached_listdir(d: str):
+    try:
+        mtime = os.stat(d).st_mtime_ns
+    except FileNotFoundError:
+        _dir_cache.pop(d, None)
+        return []
+    hit = _dir_cache.get(d)
+    if hit and hit[0] == mtime:
+        return hit[1]
+    names = os.listdir(d)
+    _dir_cache[d] = (mtime, names)
+    return names
+
+def _invalidate_dir(d: str):
+    _dir_cache.pop(d, None)
+
+_MP4_TAIL_RE = re.compile(r"(?:_.+)?\.mp4", re.IGNORECASE)
+
 def any_mp4_exists_in_dirs(dirs, shortcode: str, basename: str) -> bool:
-    sc_pat = re.compile(rf"^{re.escape(shortcode)}(?:_.+)?\.mp4$", re.IGNORECASE)
-    bs_pat = re.compile(rf"^{re.escape(basename)}(?:_.+)?\.mp4$", re.IGNORECASE)
+    # "<shortcode|basename>[_anything].mp4", case-insensitive; prefix test first, regex only on the tail
+    prefixes = {p.lower() for p in (shortcode, basename)}
     for d in dirs:
-        try:
-            for fn in os.listdir(d):
-                if sc_pat.match(fn) or bs_pat.match(fn):
+        for fn in _cached_listdir(d):
+            low = fn.lower()
+            for p in prefixes:
+                if low.startswith(p) and _MP4_TAIL_RE.fullmatch(fn, len(p)):
                     return True
-        except FileNotFoundError:
-            pass
     return False
 
+def _fast_move(src: str, dst: str):
+    # base_path/media and base_path/metadata share a filesystem: a rename is enough.
+    try:
+        os.replace(src, dst)
+    except OSError:
+        shutil.move(src, dst)
+
 def move_sorted(base_path: str):
     media_path = os.path.join(base_path, "media")
     meta_path  = os.path.join(base_path, "metadata")
     os.makedirs(media_path, exist_ok=True)
     os.makedirs(meta_path,  exist_ok=True)
 
-    for fname in os.listdir(base_path):
-        full = os.path.join(base_path, fname)
-        if os.path.isdir(full) or is_temp(fname):
-            continue
-        ext = os.path.splitext(fname)[1].lower()
-        if ext in MEDIA_EXTS:
-            try:
-                shutil.move(full, os.path.join(media_path, fname))
-            except shutil.Error:
-                pass
-        elif ext in META_EXTS:
+    media_prefix = media_path + os.sep
+    meta_prefix  = meta_path + os.sep
+    with os.scandir(base_path) as it:
+        for entry in it:
+            fname = entry.name
+            if entry.is_dir() or is_temp(fname):
+                continue
+            ext = os.path.splitext(fname)[1].lower()
+            if ext in MEDIA_EXTS:
+                dest_prefix = media_prefix
+            elif ext in META_EXTS:
+                dest_prefix = meta_prefix
+            else:
+                continue
             try:
-                shutil.move(full, os.path.join(meta_path, fname))
+                _fast_move(entry.path, dest_prefix + fname)
             except shutil.Error:
                 pass
+    for d in (base_path, media_path, meta_path):
+        _invalidate_dir(d)
 
-def backoff_wait(retry_idx: int, base_sec: int = BACKOFF_BASE_SEC, cap_sec: int = BACKOFF_CAP_SEC):
-    wait = min(cap_sec, int(base_sec * (2 ** retry_idx)))
+STOP = threading.Event()  # set on Ctrl+C; workers poll it and wake from their waits
+
+class TokenBucket:
+    """Holds up to `capacity` tokens refilled at `refill_per_sec`, plus a `min_gap` between grants.
+
+    While budget is left posts are spaced `min_gap` apart (the old fixed sleep);
+    once it is spent acquire() falls back to the refill rate.
+    """
+    def __init__(self, capacity: float = POST_BURST, refill_per_sec: float = POSTS_PER_HOUR / 3600,
+                 min_gap: float = POST_MIN_GAP):
+        self.capacity = float(capacity)
+        self.rate = float(refill_per_sec)
+        self.min_gap = float(min_gap)
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self.next_free = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, n: float = 1.0):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            wait = max(wait, self.next_free - now)
+            self.next_free = now + wait + self.min_gap
+        if wait > 0:
+            STOP.wait(wait)
+
+_BUCKETS = {}  # sessionid -> TokenBucket; rotation just switches which one is drawn from
+_BUCKETS_LOCK = threading.Lock()
+
+def bucket_for(sessionid: str) -> TokenBucket:
+    with _BUCKETS_LOCK:
+        bucket = _BUCKETS.get(sessionid)
+        if bucket is None:
+            bucket = _BUCKETS[sessionid] = TokenBucket()
+        return bucket
+
+# How long a throttle-backoff actually needed to be, learned across workers. Samples
+# come only from a wrap backoff followed by a success (or from Retry-After), never
+# from time spent on other sessions.
+_throttle_state = {"ema_recovery": float(BACKOFF_BASE_SEC)}
+_THROTTLE_LOCK = threading.Lock()
+_RETRY_AFTER_RX = re.compile(r"retry[- ]after\D{0,5}(\d+)", re.IGNORECASE)
+
+def note_throttle(state, exc=None):
+    """Record a 401/403/429-style response on this worker (and any Retry-After it carried)."""
+    state.pop("pending_recovery", None)  # the last backoff (if any) was not enough
+    m = _RETRY_AFTER_RX.search(str(exc or ""))
+    if m:
+        state["retry_after"] = int(m.group(1))
+
+def note_recovered(state):
+    """First success after a throttle backoff: fold the wait that worked into the EMA."""
+    state.pop("retry_after", None)  # a Retry-After from before this success is stale
+    waited = state.pop("pending_recovery", None)
+    if waited is None:
+        return
+    with _THROTTLE_LOCK:
+        _throttle_state["ema_recovery"] = 0.7 * _throttle_state["ema_recovery"] + 0.3 * waited
+
+def backoff_wait(retry_idx: int, state=None, cap_sec: int = BACKOFF_CAP_SEC):
+    """Sleep before retrying. Without a worker `state` (the proactive wrap pause) this
+    is the plain BACKOFF_BASE_SEC; with one, the wait adapts to learned recovery."""
+    if state is None:
+        wait = BACKOFF_BASE_SEC
+    else:
+        with _THROTTLE_LOCK:
+            ema = _throttle_state["ema_recovery"]
+        retry_after = state.pop("retry_after", 0)
+        # Grow from the learned recovery time, jittered so workers don't retry in
+        # lockstep. Never under the old 120s floor or over the cap; later retries may
+        # come sooner or later than the old doubling schedule. Retry-After still wins.
+        wait = ema * (1.5 ** retry_idx) * random.uniform(0.5, 1.5)
+        wait = int(max(min(cap_sec, max(wait, BACKOFF_BASE_SEC)), retry_after))
+        state["pending_recovery"] = retry_after or wait
     print(f"⏳ Throttled/Unauthorized. Retrying in {wait//60}m {wait%60}s...")
-    time.sleep(wait)
+    STOP.wait(wait)
 
 def to_utc(dt):
     """Return dt as timezone-aware UTC (handles naive/aware inputs)."""
@@ -268,29 +427,66 @@ def to_utc(dt):
         return dt.replace(tzinfo=timezone.utc)
     return dt.astimezone(timezone.utc)
 
-def expected_basename_from_post(post) -> str:
+def basename_from_utc(dt_utc) -> str:
     """
     Instaloader's default basename: YYYY-MM-DD_HH-MM-SS_UTC
     """
-    dt = getattr(post, "date_utc", None)
-    if dt is None:
-        return ""
-    dt = to_utc(dt)
-    return dt.strftime("%Y-%m-%d_%H-%M-%S_UTC")
+    return dt_utc.strftime("%Y-%m-%d_%H-%M-%S_UTC") if dt_utc else ""
+
+def expected_basename_from_post(post) -> str:
+    return basename_from_utc(to_utc(getattr(post, "date_utc", None)))
+
+class PostView:
+    """Per-post fields the loop reads, looked up once; `post` stays for API calls."""
+    __slots__ = ("post", "shortcode", "dt_utc", "basename")
+
+    def __init__(self, post):
+        self.post = post
+        self.shortcode = getattr(post, "shortcode", None)
+        self.dt_utc = to_utc(getattr(post, "date_utc", None))
+        self.basename = basename_from_utc(self.dt_utc)
 
 # —— Smarter mp4 existence checks to kill duplicates ——
 def any_mp4_exists_for_post(dir_path: str, shortcode: str, basename: str) -> bool:
-    sc_pat = re.compile(rf"^{re.escape(shortcode)}(?:_.+)?\.mp4$", re.IGNORECASE)
-    bs_pat = re.compile(rf"^{re.escape(basename)}(?:_.+)?\.mp4$", re.IGNORECASE)
+    return any_mp4_exists_in_dirs([dir_path], shortcode, basename)
+
+# Fallback URLs being fetched right now (url -> done event), and the ones already
+# saved this run (url -> dest)
+_inflight = {}
+_saved_urls = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+def _link_or_copy(src: str, dest_path: str) -> bool:
+    """Materialize an already-downloaded clip under a second name (hard link, else copy)."""
+    if os.path.exists(dest_path):
+        return False
     try:
-        for fn in os.listdir(dir_path):
-            if sc_pat.match(fn) or bs_pat.match(fn):
-                return True
-    except FileNotFoundError:
+        try:
+            os.link(src, dest_path)
+        except OSError:
+            shutil.copyfile(src, dest_path)
+    except OSError as e:
+        print(f"   ↪️  Fallback copy failed: {e}")
         return False
-    return False
+    _invalidate_dir(os.path.dirname(dest_path))
+    return True
 
 def stream_save(session, url: str, dest_path: str) -> bool:
+    with _INFLIGHT_LOCK:
+        src = _saved_urls.get(url)
+        done = _inflight.get(url) if src is None else None
+        owner = src is None and done is None
+        if owner:
+            done = _inflight[url] = threading.Event()
+    if not owner:
+        # Same clip reused by another sidecar: reuse that download instead of refetching.
+        if src is None:
+            done.wait()
+            with _INFLIGHT_LOCK:
+                src = _saved_urls.get(url)
+            if src is None:
+                return False  # the other fetch failed
+        return _link_or_copy(src, dest_path)
     try:
         with session.get(url, stream=True, timeout=60) as r:
             r.raise_for_status()
@@ -298,25 +494,43 @@ def stream_save(session, url: str, dest_path: str) -> bool:
                 for chunk in r.iter_content(chunk_size=1024 * 256):
                     if chunk:
                         f.write(chunk)
+        _invalidate_dir(os.path.dirname(dest_path))
+        with _INFLIGHT_LOCK:
+            _saved_urls[url] = dest_path
         return True
     except Exception as e:
         print(f"   ↪️  Fallback download failed: {e}")
         return False
+    finally:
+        with _INFLIGHT_LOCK:
+            _inflight.pop(url, None)
+        done.set()
+
+def stream_save_many(session, jobs) -> int:
+    """Fetch several (url, dest_path) pairs concurrently; return how many were saved."""
+    if not jobs:
+        return 0
+    if len(jobs) == 1:
+        return int(stream_save(session, *jobs[0]))
+    with ThreadPoolExecutor(max_workers=min(FALLBACK_WORKERS, len(jobs))) as pool:
+        return sum(pool.map(lambda job: stream_save(session, *job), jobs))
 
 def ensure_post_videos(L, post, media_dir, base_path) -> int:
-    rescued = 0
+    view = post if isinstance(post, PostView) else PostView(post)
+    post = view.post
     session = L.context._session
-    shortcode = getattr(post, "shortcode", None) or "unknown"
-    basename  = expected_basename_from_post(post) or shortcode
+    shortcode = view.shortcode or "unknown"
+    basename  = view.basename or shortcode
     look_dirs = [media_dir, base_path]
+    mdp = media_dir + os.sep  # joined once; names below are plain concatenation
+    jobs = []
 
     # Single video / reel
     if getattr(post, "is_video", False):
         if not any_mp4_exists_in_dirs(look_dirs, shortcode, basename) and getattr(post, "video_url", None):
-            dest = os.path.join(media_dir, f"{basename}.mp4")
-            print(f"   ↪️  No mp4 for {shortcode}. Trying fallback → {os.path.basename(dest)}")
-            if stream_save(session, post.video_url, dest):
-                rescued += 1
+            name = f"{basename}.mp4"
+            print(f"   ↪️  No mp4 for {shortcode}. Trying fallback → {name}")
+            jobs.append((post.video_url, mdp + name))
 
     # Sidecar videos — save each sidecar if its own file is missing (don’t block on main existing)
     try:
@@ -324,157 +538,179 @@ def ensure_post_videos(L, post, media_dir, base_path) -> int:
             nodes = list(post.get_sidecar_nodes())
             for i, node in enumerate(nodes):
                 if getattr(node, "is_video", False) and getattr(node, "video_url", None):
-                    side_dest = os.path.join(media_dir, f"{basename}_{i+1}.mp4")
+                    side_name = f"{basename}_{i+1}.mp4"
+                    side_dest = mdp + side_name
                     if not os.path.exists(side_dest):
-                        print(f"   ↪️  Sidecar fallback {shortcode} [{i+1}] → {os.path.basename(side_dest)}")
-                        if stream_save(session, node.video_url, side_dest):
-                            rescued += 1
+                        print(f"   ↪️  Sidecar fallback {shortcode} [{i+1}] → {side_name}")
+                        jobs.append((node.video_url, side_dest))
     except Exception as e:
         print(f"   ↪️  Sidecar probe failed: {e}")
 
-    return rescued
+    return stream_save_many(session, jobs)
 
 # —————————————————————————————
 # 5) MAIN DOWNLOAD LOOP
 # —————————————————————————————
+def in_window(dt_utc, after_dt, before_dt):
+    """Inclusive window check with UTC normalization."""
+    if dt_utc is None:
+        return False
+    dt_utc = to_utc(dt_utc)
+    if after_dt and dt_utc < after_dt:
+        return False
+    if before_dt and dt_utc > before_dt:
+        return False
+    return True
+
+def process_profile(profile, L, sessions, sess_state, before_dt, after_dt) -> int:
+    """Download one profile with its worker's loader; returns videos rescued."""
+    use_window = (before_dt is not None) or (after_dt is not None)
+    print(f"\n📥 Starting download for: {profile}")
+    base_path = os.path.join("downloads", profile)
+    os.makedirs(base_path, exist_ok=True)
+    media_path, meta_path = ensure_dirs_for_profile(base_path)
+    log_file = os.path.join(meta_path, "skipped.log")
+
+    retry = 0
+    while retry < MAX_RETRIES_PROFILE and not STOP.is_set():
+        try:
+            inst_profile = instaloader.Profile.from_username(L.context, profile)
+            note_recovered(sess_state)
+
+            count_attempted = 0
+            rescued_here = 0
+            stop_this_profile = False
+
+            # >>> PINNED POSTS HANDLING <<<
+            leading_seen_skips = 0
+            downloaded_new_this_run = False
+
+            for post in iter_posts_windowed(inst_profile.get_posts(), before_dt):  # newest → oldest
+                view = PostView(post)
+                dt_utc, shortcode, basename = view.dt_utc, view.shortcode, view.basename
+
+                if STOP.is_set():
+                    break
+                # If using a date window, skip fast until we reach it
+                if use_window and not in_window(dt_utc, after_dt, before_dt):
+                    # too NEW for --before: keep skipping
+                    if before_dt and dt_utc and dt_utc > before_dt:
+                        continue
+                    # too OLD for --after: everything next will be older → break
+                    if after_dt and dt_utc and dt_utc < after_dt:
+                        break
+                    # default
+                    continue
+
+                # Inside the desired window now — honor seen/stop logic
+                if already_logged_post(media_path, basename, shortcode):
+                    if (not downloaded_new_this_run) and (leading_seen_skips < MAX_LEADING_SEEN_SKIPS):
+                        leading_seen_skips += 1
+                        print(f"📌 Leading seen #{leading_seen_skips} for {profile} "
+                              f"({basename or shortcode}). Skipping (likely pinned/old)…")
+                        continue
+                    print(f"⛔ Reached already-seen territory for {profile}: {basename or shortcode}. Stopping this profile.")
+                    stop_this_profile = True
+                    break
+
+                # ——— Normal download path for an unseen post ———
+                attempts = 0
+                while attempts < MAX_RETRIES_POST:
+                    try:
+                        bucket_for(sessions[sess_state["idx"]]).acquire()
+                        # Instaloader downloads into base_path
+                        L.download_post(post, target=base_path)
+                        note_recovered(sess_state)
+                        # Verify / fallback for reels & videos (check media dir to avoid dups)
+                        rescued_here += ensure_post_videos(L, view, media_path, base_path)
+                        count_attempted += 1
+                        downloaded_new_this_run = True
+
+                        # Proactive rotation every N posts if enabled
+                        if ROTATE_EVERY_POSTS and (count_attempted % ROTATE_EVERY_POSTS == 0):
+                            wrapped = rotate_to_next_session(L, sessions, sess_state)
+                            if wrapped:
+                                backoff_wait(0)  # short pause when a full cycle completes
+                        break
+                    except exceptions.ConnectionException as e:
+                        attempts += 1
+                        if attempts < MAX_RETRIES_POST:
+                            print(f"⚠️ Post {shortcode or '?'}: {e} → retrying in 10s ({attempts}/{MAX_RETRIES_POST})")
+                            STOP.wait(10)
+                        else:
+                            print(f"❌ Skipping post {shortcode or '?'} after {MAX_RETRIES_POST} attempts: {e}")
+                            try:
+                                with open(log_file, "a", encoding="utf-8") as logf:
+                                    logf.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')}  {shortcode or '?'}  {e}\n")
+                            except Exception:
+                                pass
+                            break
+
+            move_sorted(base_path)
+            # One write so parallel workers can't split the pair summarize_insta_log.py reads
+            print(f"✅ Download phase done ({count_attempted} posts attempted, {rescued_here} videos rescued). Files organized.\n"
+                  f"✅ Finished profile: {profile}")
+            return rescued_here
+
+        except exceptions.ProfileNotExistsException:
+            print(f"🚫 Profile not found: {profile}. Skipping.")
+            return 0
+        except exceptions.PrivateProfileNotFollowedException:
+            print(f"🔒 Private profile (not followed): {profile}. Skipping.")
+            return 0
+        except exceptions.ConnectionException as e:
+            msg = str(e)
+            # If auth/throttle-ish → rotate session first, then backoff/retry
+            if ("401" in msg) or ("403" in msg) or ("429" in msg) or ("Please wait a few minutes" in msg):
+                note_throttle(sess_state, e)
+                wrapped = rotate_to_next_session(L, sessions, sess_state)
+                if wrapped:
+                    backoff_wait(retry, sess_state)
+                    retry += 1
+                # continue loop with new session (no immediate backoff if not wrapped)
+                continue
+            # otherwise re-raise unknown connection errors
+            raise
+    return 0
+
 def main():
     args = parse_args()
     before_dt = parse_date_utc(args.before)
     after_dt  = parse_date_utc(args.after)
-    use_window = (before_dt is not None) or (after_dt is not None)
 
     initial_cleanup()
     os.makedirs("downloads", exist_ok=True)
 
     sessions = load_sessions()
-    sess_state = {"idx": 0}
-    L = make_loader(sessions[sess_state["idx"]])
-
     profiles = load_profiles(args)
     total_rescued = 0
 
-    def in_window(dt_utc):
-        """Inclusive window check with UTC normalization."""
-        if dt_utc is None:
-            return False
-        dt_utc = to_utc(dt_utc)
-        if after_dt and dt_utc < after_dt:
-            return False
-        if before_dt and dt_utc > before_dt:
-            return False
-        return True
+    # Rate limits are per account: worker k owns sessions[k::n_workers] (its own
+    # loader and rotation), so two workers never share an account.
+    n_workers = max(1, min(len(sessions), len(profiles)))
+    workers = queue.Queue()
+    for k in range(n_workers):
+        own = sessions[k::n_workers]
+        workers.put((make_loader(own[0]), own, {"idx": 0}))
 
-    try:
-        for profile in profiles:
-            print(f"\n📥 Starting download for: {profile}")
-            base_path = os.path.join("downloads", profile)
-            os.makedirs(base_path, exist_ok=True)
-            media_path, meta_path = ensure_dirs_for_profile(base_path)
-            log_file = os.path.join(meta_path, "skipped.log")
-
-            retry = 0
-            while retry < MAX_RETRIES_PROFILE:
-                try:
-                    inst_profile = instaloader.Profile.from_username(L.context, profile)
-
-                    count_attempted = 0
-                    rescued_here = 0
-                    stop_this_profile = False
-
-                    # >>> PINNED POSTS HANDLING <<<
-                    leading_seen_skips = 0
-                    downloaded_new_this_run = False
-
-                    for post in inst_profile.get_posts():  # newest → oldest
-                        dt = getattr(post, "date_utc", None)
-                        dt_utc = to_utc(dt)
-                        shortcode = getattr(post, "shortcode", None)
-                        basename = expected_basename_from_post(post)
-
-                        # If using a date window, skip fast until we reach it
-                        if use_window and not in_window(dt_utc):
-                            # too NEW for --before: keep skipping
-                            if before_dt and dt_utc and dt_utc > before_dt:
-                                continue
-                            # too OLD for --after: everything next will be older → break
-                            if after_dt and dt_utc and dt_utc < after_dt:
-                                break
-                            # default
-                            continue
-
-                        # Inside the desired window now — honor seen/stop logic
-                        if already_logged_post(media_path, basename, shortcode):
-                            if (not downloaded_new_this_run) and (leading_seen_skips < MAX_LEADING_SEEN_SKIPS):
-                                leading_seen_skips += 1
-                                print(f"📌 Leading seen #{leading_seen_skips} for {profile} "
-                                      f"({basename or shortcode}). Skipping (likely pinned/old)…")
-                                continue
-                            print(f"⛔ Reached already-seen territory for {profile}: {basename or shortcode}. Stopping this profile.")
-                            stop_this_profile = True
-                            break
-
-                        # ——— Normal download path for an unseen post ———
-                        attempts = 0
-                        while attempts < MAX_RETRIES_POST:
-                            try:
-                                # Instaloader downloads into base_path
-                                L.download_post(post, target=base_path)
-                                # Verify / fallback for reels & videos (check media dir to avoid dups)
-                                rescued_here += ensure_post_videos(L, post, media_path, base_path)
-                                count_attempted += 1
-                                downloaded_new_this_run = True
-
-                                # Proactive rotation every N posts if enabled
-                                if ROTATE_EVERY_POSTS and (count_attempted % ROTATE_EVERY_POSTS == 0):
-                                    wrapped = rotate_to_next_session(L, sessions, sess_state)
-                                    if wrapped:
-                                        backoff_wait(0)  # short pause when a full cycle completes
-
-                                if PER_POST_SLEEP > 0:
-                                    time.sleep(PER_POST_SLEEP)
-                                break
-                            except exceptions.ConnectionException as e:
-                                attempts += 1
-                                if attempts < MAX_RETRIES_POST:
-                                    print(f"⚠️ Post {getattr(post,'shortcode','?')}: {e} → retrying in 10s ({attempts}/{MAX_RETRIES_POST})")
-                                    time.sleep(10)
-                                else:
-                                    print(f"❌ Skipping post {getattr(post,'shortcode','?')} after {MAX_RETRIES_POST} attempts: {e}")
-                                    try:
-                                        with open(log_file, "a", encoding="utf-8") as logf:
-                                            logf.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')}  {getattr(post,'shortcode','?')}  {e}\n")
-                                    except Exception:
-                                        pass
-                                    break
-
-                    print(f"✅ Download phase done ({count_attempted} posts attempted, {rescued_here} videos rescued). Organizing files…")
-                    move_sorted(base_path)
-                    print(f"✅ Finished profile: {profile}")
-                    total_rescued += rescued_here
-                    break  # done with this profile (don’t retry profile-level loop)
-
-                except exceptions.ProfileNotExistsException:
-                    print(f"🚫 Profile not found: {profile}. Skipping.")
-                    break
-                except exceptions.PrivateProfileNotFollowedException:
-                    print(f"🔒 Private profile (not followed): {profile}. Skipping.")
-                    break
-                except exceptions.ConnectionException as e:
-                    msg = str(e)
-                    # If auth/throttle-ish → rotate session first, then backoff/retry
-                    if ("401" in msg) or ("403" in msg) or ("429" in msg) or ("Please wait a few minutes" in msg):
-                        wrapped = rotate_to_next_session(L, sessions, sess_state)
-                        if wrapped:
-                            backoff_wait(retry)
-                            retry += 1
-                        # continue loop with new session (no immediate backoff if not wrapped)
-                        continue
-                    # otherwise re-raise unknown connection errors
-                    raise
+    def run(profile):
+        L, own, state = workers.get()
+        try:
+            return process_profile(profile, L, own, state, before_dt, after_dt)
+        finally:
+            workers.put((L, own, state))
 
+    pool = ThreadPoolExecutor(max_workers=n_workers)
+    try:
+        futures = [pool.submit(run, profile) for profile in profiles]
+        for fut in futures:
+            total_rescued += fut.result()
+        pool.shutdown()
         print(f"\n🎉 All done! Total rescued videos via fallback: {total_rescued}")
 
     except KeyboardInterrupt:
+        STOP.set()
+        pool.shutdown(wait=True, cancel_futures=True)
         print("\n🛑 Stopped by user. Organizing any downloaded files before exit…")
         for profile in profiles:
             base_path = os.path.join("downloads", profile)
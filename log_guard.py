@@ -1,10 +1,14 @@
 # log_guard.py — reads per-profile logs from /srv/igdl/media_log/{profile}_media_log.csv
 import csv
+import hashlib
 import os
-from typing import Set
+import pickle
+import re
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
 
 MEDIA_LOG_ROOT = "/srv/igdl/media_log"          # central location for all CSVs
 FALLBACK_NAME  = "media_log.csv"                # fallback inside each profile's media/ if needed
+INDEX_CACHE_DIR = os.path.expanduser("~/.cache/igdl")  # pickled parses, reused across runs
 
 def _infer_profile_from_media_dir(media_dir: str) -> str:
     """
@@ -16,28 +20,144 @@ def _infer_profile_from_media_dir(media_dir: str) -> str:
     except Exception:
         return ""
 
-def _load_logged_filenames(media_dir: str) -> Set[str]:
+# 11-char IG shortcode sitting between "_" and "_"/"." in a media filename
+_SHORTCODE_RX = re.compile(r"_([A-Za-z0-9_-]{11})(?=[_.])")
+
+class _LogIndex:
+    """Parsed names of one CSV plus lookup structures built from them."""
+    __slots__ = ("names", "shortcodes", "_prefixes", "_blob")
+
+    def __init__(self, names: FrozenSet[str], shortcodes: Optional[Set[str]] = None):
+        self.names = names
+        if shortcodes is None:
+            shortcodes = {m for n in names for m in _SHORTCODE_RX.findall(n)}
+        self.shortcodes = shortcodes
+        self._prefixes: Dict[int, Set[str]] = {}
+        self._blob = "\n".join(names)
+
+    def has_prefix(self, basename: str) -> bool:
+        prefixes = self._prefixes.get(len(basename))
+        if prefixes is None:
+            n = len(basename)
+            prefixes = self._prefixes[n] = {name[:n] for name in self.names}
+        return basename in prefixes
+
+    def has_token(self, token: str) -> bool:
+        # Set hit first; on a miss one C-level search of the joined names keeps the
+        # old "shortcode appears anywhere in a name" answer for mixed naming schemes.
+        return token in self.shortcodes or token in self._blob
+
+    def seen(self, basename: str, shortcode: str) -> bool:
+        """True when a logged name starts with basename or contains shortcode."""
+        basename = (basename or "").strip()
+        shortcode = (shortcode or "").strip()
+        return (bool(basename) and self.has_prefix(basename)) or \
+               (bool(shortcode) and self.has_token(shortcode))
+
+# path -> (st_mtime_ns, st_size, index); re-parsed only when the CSV changes
+_CACHE: Dict[str, Tuple[int, int, _LogIndex]] = {}
+_EMPTY = _LogIndex(frozenset())
+
+def _candidate_paths(media_dir: str) -> List[str]:
+    paths = []
+    profile = _infer_profile_from_media_dir(media_dir)
+    if profile:
+        paths.append(os.path.join(MEDIA_LOG_ROOT, f"{profile}_media_log.csv"))
+    paths.append(os.path.join(media_dir, FALLBACK_NAME))
+    return paths
+
+def _disk_cache_path(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8", "surrogateescape")).hexdigest()[:12]
+    return os.path.join(INDEX_CACHE_DIR, f"{stem}-{digest}.pkl")
+
+def _load_disk_index(path: str, mtime_ns: int, size: int) -> Optional[_LogIndex]:
+    try:
+        with open(_disk_cache_path(path), "rb") as f:
+            cached_mtime, cached_size, names, shortcodes = pickle.load(f)
+    except Exception:
+        return None
+    if cached_mtime != mtime_ns or cached_size != size:
+        return None
+    return _LogIndex(names, shortcodes)
+
+def _save_disk_index(path: str, mtime_ns: int, size: int, index: _LogIndex) -> None:
+    dest = _disk_cache_path(path)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(INDEX_CACHE_DIR, exist_ok=True)
+        with open(tmp, "wb") as f:
+            pickle.dump((mtime_ns, size, index.names, index.shortcodes), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, dest)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+def _cached_index(path: str) -> _LogIndex:
+    try:
+        st = os.stat(path)
+    except OSError:
+        _CACHE.pop(path, None)
+        return _EMPTY
+    hit = _CACHE.get(path)
+    if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+    index = _load_disk_index(path, st.st_mtime_ns, st.st_size)
+    if index is None:
+        names: Set[str] = set()
+        _read_csv_into_set(path, names)
+        index = _LogIndex(frozenset(names))
+        _save_disk_index(path, st.st_mtime_ns, st.st_size, index)
+    _CACHE[path] = (st.st_mtime_ns, st.st_size, index)
+    return index
+
+# media_dirs with no CSV at all, remembered for the rest of the run. The
+# downloader never writes these CSVs; a process that does must call
+# invalidate(profile) afterwards so the new log is picked up.
+_NO_LOG: Set[str] = set()
+
+def _load_index(media_dir: str) -> _LogIndex:
+    if media_dir in _NO_LOG:
+        return _EMPTY
+    paths = _candidate_paths(media_dir)
+    for path in paths:
+        index = _cached_index(path)
+        if index.names:
+            return index
+    if not any(path in _CACHE for path in paths):
+        # No CSV at all (an existing empty one is re-checked via its own mtime).
+        _NO_LOG.add(media_dir)
+    return _EMPTY
+
+def _load_logged_filenames(media_dir: str) -> FrozenSet[str]:
     """
     Prefer /srv/igdl/media_log/<profile>_media_log.csv.
     If not present, fall back to <media_dir>/media_log.csv.
-    Returns a set of filenames (strings).
+    Returns a set of filenames (strings), cached until the CSV's mtime/size changes.
     """
-    names: Set[str] = set()
-
-    # 1) Try central CSV: /srv/igdl/media_log/<profile>_media_log.csv
-    profile = _infer_profile_from_media_dir(media_dir)
-    if profile:
-        central_path = os.path.join(MEDIA_LOG_ROOT, f"{profile}_media_log.csv")
-        if os.path.isfile(central_path):
-            _read_csv_into_set(central_path, names)
+    return _load_index(media_dir).names
 
-    # 2) Fallback: local CSV inside the media folder
-    if not names:
-        local_path = os.path.join(media_dir, FALLBACK_NAME)
-        if os.path.isfile(local_path):
-            _read_csv_into_set(local_path, names)
+def load_index(media_dir: str) -> _LogIndex:
+    """Same CSV lookup as _load_logged_filenames, returned as a queryable index.
+    Callers checking many posts can hold it and call seen() without re-statting."""
+    return _load_index(media_dir)
 
-    return names
+def invalidate(profile: str = "") -> None:
+    """Drop cached CSVs for one profile (or all of them) to force a reload.
+    Call after writing a profile's CSV; a missing log is otherwise cached for the run."""
+    if not profile:
+        _CACHE.clear()
+        _NO_LOG.clear()
+        return
+    for path in list(_CACHE):
+        if os.path.basename(path) == f"{profile}_media_log.csv" or \
+           _infer_profile_from_media_dir(os.path.dirname(path)) == profile:
+            _CACHE.pop(path, None)
+    for media_dir in list(_NO_LOG):
+        if _infer_profile_from_media_dir(media_dir) == profile:
+            _NO_LOG.discard(media_dir)
 
 def _read_csv_into_set(path: str, out: Set[str]) -> None:
     """
@@ -46,15 +166,14 @@ def _read_csv_into_set(path: str, out: Set[str]) -> None:
     """
     try:
         with open(path, "r", encoding="utf-8", newline="") as f:
-            reader = csv.DictReader(f)
-            field_map = {k.lower(): k for k in (reader.fieldnames or [])}
-            fname_col = field_map.get("filename")
-            if not fname_col:
+            reader = csv.reader(f)
+            header = next(reader, None) or []
+            lowered = [h.strip().lower() for h in header]
+            if "filename" not in lowered:
                 return
-            for row in reader:
-                fn = (row.get(fname_col) or "").strip()
-                if fn:
-                    out.add(fn)
+            idx = lowered.index("filename")
+            out.update(row[idx].strip() for row in reader if len(row) > idx)
+            out.discard("")
     except Exception:
         pass
 
@@ -62,21 +181,13 @@ def already_logged_by_basename(media_dir: str, basename: str) -> bool:
     basename = (basename or "").strip()
     if not basename:
         return False
-    for name in _load_logged_filenames(media_dir):
-        if name.startswith(basename):
-            return True
-    return False
+    return _load_index(media_dir).has_prefix(basename)
 
 def already_logged_by_shortcode(media_dir: str, shortcode: str) -> bool:
     shortcode = (shortcode or "").strip()
     if not shortcode:
         return False
-    token = f"{shortcode}"
-    for name in _load_logged_filenames(media_dir):
-        if token in name:
-            return True
-    return False
+    return _load_index(media_dir).has_token(shortcode)
 
 def already_logged_post(media_dir: str, basename: str, shortcode: str) -> bool:
-    return already_logged_by_basename(media_dir, basename) or \
-           already_logged_by_shortcode(media_dir, shortcode)
+    return _load_index(media_dir).seen(basename, shortcode)